@@ -0,0 +1,110 @@
+"""Generate Python source for benchmarking the plugin."""
+import random
+
+
+BRACKETS = (('[', ']'), ('(', ')'), ('{', '}'))
+
+# Strings that contain characters the plugin must ignore.
+STRINGS = ("'a[b]'", '"{c}"', "'(d, e)'", "r'\\d+['", "f'{x}'", "'#f'")
+
+
+def _value(rng: random.Random, string_ratio: float) -> str:
+    """Get a short expression to put inside a container."""
+    if rng.random() < string_ratio:
+        return rng.choice(STRINGS)
+
+    if rng.random() < 0.2:
+        return f'({rng.randint(0, 9)}, {rng.randint(0, 9)})'
+
+    return str(rng.randint(0, 1000))
+
+
+def _container(
+    rng: random.Random,
+    depth: int,
+    indent: int,
+    prefix: str,
+    suffix: str,
+    string_ratio: float,
+    error_ratio: float,
+) -> list:
+    """Get the lines of a multiline container, nested up to depth."""
+    opening, closing = rng.choice(BRACKETS)
+    pad = ' ' * (indent + 4)
+    lines = [f"{' ' * indent}{prefix}{opening}\n"]
+
+    # Content after the opening character is a JS101 error.
+    if rng.random() < error_ratio:
+        lines[0] = f"{lines[0][:-1]}{_value(rng, string_ratio)},\n"
+
+    for _ in range(rng.randint(1, 4)):
+        if depth > 1 and rng.random() < 0.5:
+            lines.extend(_container(
+                rng, depth - 1, indent + 4, '', ',', string_ratio, error_ratio,
+            ))
+
+        else:
+            values = ', '.join(
+                _value(rng, string_ratio) for _ in range(rng.randint(1, 3))
+            )
+            lines.append(f'{pad}{values},\n')
+
+    lines.append(f"{' ' * indent}{closing}{suffix}\n")
+    return lines
+
+
+def generate(
+    lines: int = 1000,
+    depth: int = 2,
+    density: float = 0.3,
+    string_ratio: float = 0.3,
+    comment_ratio: float = 0.1,
+    docstring_share: float = 0.1,
+    error_ratio: float = 0.05,
+    seed: int = 0,
+) -> str:
+    """Generate Python source with the given shape.
+
+    Arguments:
+        lines: Roughly how many lines to generate.
+        depth: Deepest nesting of multiline containers.
+        density: Share of statements that are multiline containers.
+        string_ratio: Share of values that are strings.
+        comment_ratio: Share of simple statements with a trailing comment.
+        docstring_share: Share of statements that are docstrings.
+        error_ratio: Share of multiline containers with a JS101 error.
+        seed: Seed for the random number generator.
+
+    Returns:
+        str
+
+    """
+    rng = random.Random(seed)
+    source = []
+    count = 0
+
+    while len(source) < lines:
+        count += 1
+        roll = rng.random()
+
+        if roll < docstring_share:
+            quote = rng.choice(('"""', "'''"))
+            source.append(f'{quote}Docstring {count} (with [brackets].\n')
+            source.extend(
+                'Text {that} is ignored.\n'
+                for _ in range(rng.randint(1, 6))
+            )
+            source.append(f'{quote}\n')
+
+        elif roll < docstring_share + density:
+            source.extend(_container(
+                rng, depth, 0, f'x{count} = ', '', string_ratio, error_ratio,
+            ))
+
+        else:
+            line = f'x{count} = {_value(rng, string_ratio)}'
+            if rng.random() < comment_ratio:
+                line += '  # a comment with a bracket ('
+            source.append(line + '\n')
+
+    return ''.join(source)
@@ -0,0 +1,272 @@
+"""Measure how fast the plugin checks generated files.
+
+Each scenario is generated once, then checked with every engine through
+MultilineContainers.run() and through flake8 itself. The reused targets
+check with one checker that is reset between files, as the standalone
+checker does. The best time of
+several repeats is kept. Peak memory is measured with tracemalloc in a
+separate run, since tracing slows everything down.
+
+A batch of small snippets is also checked with check_many, in this process
+and in a pool of processes, reporting snippets per second and the 99th
+percentile time to check one snippet.
+
+Usage:
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --compare before.json
+"""
+import argparse
+import ast
+import concurrent.futures
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tokenize
+import tracemalloc
+
+from corpus import generate
+
+import flake8_multiline_containers
+from flake8_multiline_containers import ENGINES, MultilineContainers
+from flake8_multiline_containers_standalone import check_many
+
+
+SCENARIOS = {
+    'typical': {'lines': 5000},
+    'dense': {'lines': 5000, 'depth': 4, 'density': 0.9},
+    'strings': {'lines': 5000, 'string_ratio': 0.8, 'comment_ratio': 0.5},
+    'docstrings': {'lines': 5000, 'docstring_share': 0.5},
+    'small': {'lines': 50},
+}
+
+
+def _checker_factory(engine: str, lines: list):
+    """Get a function that makes a checker like flake8 would."""
+    tree = ast.parse(''.join(lines))
+    tokens = list(tokenize.generate_tokens(iter(lines).__next__))
+
+    def make():
+        return MultilineContainers(
+            tree=tree, lines=lines, file_tokens=tokens, engine=engine,
+        )
+
+    # Without an AST or tokens the engines make their own.
+    def make_from_lines():
+        return MultilineContainers(lines=lines, engine=engine)
+
+    reused = MultilineContainers()
+
+    def reuse():
+        return reused.reset(
+            tree=tree, lines=lines, file_tokens=tokens, engine=engine,
+        )
+
+    return make, make_from_lines, reuse
+
+
+def _best_time(function, repeat: int) -> float:
+    """Get the fastest of several calls to a function, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        flake8_multiline_containers.line_cache.cache_clear()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(function) -> int:
+    """Get the most memory allocated during a call, in bytes."""
+    flake8_multiline_containers.line_cache.cache_clear()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _flake8_check(source: str):
+    """Get a function that checks the source with flake8."""
+    from flake8.api import legacy as flake8
+    from flake8.formatting.base import BaseFormatter
+
+    class Silent(BaseFormatter):
+        def format(self, error):
+            return None
+
+    style_guide = flake8.get_style_guide(select=['JS101', 'JS102'])
+    style_guide.init_report(Silent)
+    fd, path = tempfile.mkstemp(suffix='.py')
+    with os.fdopen(fd, 'w') as f:
+        f.write(source)
+
+    def check():
+        style_guide.check_files([path])
+
+    return check, path
+
+
+def measure(name: str, params: dict, repeat: int) -> list:
+    """Measure every way of checking one scenario."""
+    source = generate(**params)
+    lines = source.splitlines(keepends=True)
+    results = []
+
+    targets = {}
+    for engine in ['auto', *(n for n, e in ENGINES.items() if e.available)]:
+        make, make_from_lines, reuse = _checker_factory(engine, lines)
+        targets[f'run:{engine}'] = lambda make=make: list(make().run())
+        targets[f'run:{engine}:from-lines'] = (
+            lambda make=make_from_lines: list(make().run())
+        )
+        targets[f'run:{engine}:reused'] = (
+            lambda make=reuse: list(make().run())
+        )
+
+    flake8_check, path = _flake8_check(source)
+    targets['flake8'] = flake8_check
+
+    try:
+        for target, function in targets.items():
+            seconds = _best_time(function, repeat)
+            results.append({
+                'scenario': name,
+                'target': target,
+                'lines': len(lines),
+                'seconds': seconds,
+                'lines_per_second': len(lines) / seconds,
+                'peak_bytes': _peak_memory(function),
+            })
+    finally:
+        os.remove(path)
+
+    return results
+
+
+# Number of snippets, and lines in each, checked by the batch benchmark.
+SNIPPETS = 1000
+SNIPPET_LINES = 20
+
+
+def measure_batch(repeat: int) -> list:
+    """Measure checking a batch of small snippets with check_many."""
+    snippets = [
+        (f'snippet{seed}.py', generate(lines=SNIPPET_LINES, seed=seed))
+        for seed in range(SNIPPETS)
+    ]
+    lines = sum(source.count('\n') for _, source in snippets)
+    results = []
+
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        # Start the workers before timing anything.
+        check_many(snippets, executor=executor)
+
+        targets = {
+            'check_many': lambda: check_many(snippets),
+            'check_many:pool': lambda: check_many(snippets, executor=executor),
+        }
+        for target, function in targets.items():
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                checked = function()
+                seconds = time.perf_counter() - start
+                if seconds < best:
+                    best = seconds
+                    times = sorted(r.seconds for r in checked)
+
+            results.append({
+                'scenario': 'snippets',
+                'target': target,
+                'lines': lines,
+                'seconds': best,
+                'lines_per_second': lines / best,
+                'snippets_per_second': SNIPPETS / best,
+                'p99_seconds': times[int(len(times) * 0.99)],
+                'peak_bytes': _peak_memory(function),
+            })
+
+    return results
+
+
+def compare(results: list, baseline: list):
+    """Print how much faster each result is than the baseline."""
+    old = {(r['scenario'], r['target']): r for r in baseline}
+
+    print(f"{'scenario':<12} {'target':<26} {'lines/s':>12} "
+          f"{'speedup':>8} {'peak KiB':>9} {'memory':>7}")
+    for r in results:
+        line = (
+            f"{r['scenario']:<12} {r['target']:<26} "
+            f"{r['lines_per_second']:>12,.0f}"
+        )
+        before = old.get((r['scenario'], r['target']))
+        if before is None:
+            line += f" {'-':>8} {r['peak_bytes'] / 1024:>9,.0f} {'-':>7}"
+        else:
+            speedup = before['seconds'] / r['seconds']
+            memory = r['peak_bytes'] / max(before['peak_bytes'], 1)
+            line += (
+                f' {speedup:>7.2f}x {r["peak_bytes"] / 1024:>9,.0f} '
+                f'{memory:>6.2f}x'
+            )
+        print(line)
+
+    for r in results:
+        if 'snippets_per_second' in r:
+            print(
+                f"{r['target']:<26} {r['snippets_per_second']:>12,.0f} "
+                f"snippets/s, p99 {r['p99_seconds'] * 1e3:.3f}ms",
+            )
+
+
+def main(argv: list = None) -> int:
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        'scenarios', nargs='*', choices=[[], *SCENARIOS], default=[],
+        help='Scenarios to run. (Default: all)',
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--no-batch', action='store_true',
+        help='Skip checking a batch of snippets with check_many.',
+    )
+    parser.add_argument('--output', help='Write the results to a JSON file.')
+    parser.add_argument(
+        '--compare', help='JSON file from an earlier run to compare with.',
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.scenarios or SCENARIOS:
+        results.extend(measure(name, SCENARIOS[name], args.repeat))
+
+    if not args.no_batch:
+        results.extend(measure_batch(args.repeat))
+
+    report = {
+        'python': platform.python_version(),
+        'version': MultilineContainers.version,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    baseline = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+
+    compare(results, baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,32 +1,88 @@
+import array
+import ast
+import bisect
+import codecs
 import enum
+import functools
+import io
+import json
+import keyword
+import os
 import re
-
-import attr
-
-
-# Matches anything inside a string.
-STRING_REGEX = re.compile(
-    r'"([^"\\]*(\\.[^"\\]*)*)"|\'([^\'\\]*(\\.[^\'\\]*)*)\'',
+import sys
+import time
+import tokenize
+
+
+class _LazyPattern:
+    """A regular expression that is only compiled once it's first used.
+
+    flake8 imports every plugin, even when none of its codes are selected,
+    so nothing is compiled until a file is checked.
+    """
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __getattr__(self, name: str):
+        # Keep the compiled pattern's attribute, so it's found directly from
+        # then on without coming back here.
+        value = getattr(re.compile(self.pattern, self.flags), name)
+        setattr(self, name, value)
+        return value
+
+
+# Matches the start of a string or comment, from outside of any string.
+# Single quoted strings are matched whole. Only the opening of a triple quoted
+# string is matched, since it can continue onto later lines.
+LEXICAL_REGEX = _LazyPattern(
+    r"(?P<triple>'''|\"\"\")"
+    r"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+    r'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    r'|(?P<comment>#)',
 )
 
+# Matches the rest of a triple quoted string, up to and including its end.
+TRIPLE_QUOTE_END_REGEX = {
+    q * 3: _LazyPattern(
+        rf'[^\\{q}]*(?:(?:\\.|{q}(?!{q}{q}))[^\\{q}]*)*{q}{q}{q}',
+        re.DOTALL,
+    )
+    for q in ('"', "'")
+}
+
 # Matches anything that looks like a:
 # function call, function definition, or class definition with inheritance
 # Actual tuples should be ignored
-FUNCTION_CALL_REGEX = r'\w+\s*[(]'
+FUNCTION_CALL_REGEX = _LazyPattern(r'\w+\s*[(]')
 
 # Matches anything that looks like a conditional block
-CONDITIONAL_BLOCK_REGEX = re.compile(
+CONDITIONAL_BLOCK_REGEX = _LazyPattern(
     r'if\s*[(]|elif\s*[(]|or\s*[(]*[(]|and\s*[(]|not\s*[(]')
 
+# Matches any container character.
+BRACKET_REGEX = _LazyPattern(r'[][(){}]')
+
+# Matches any character that can change what the lines engine knows. A line
+# without one can't open or close a container, or a string.
+PREFILTER_REGEX = _LazyPattern(r'[][(){}\'"]')
+
 
 class ErrorCodes(enum.Enum):
     JS101 = "Multi-line container not broken after opening character"
     JS102 = "Multi-line container does not close on same column as opening"
 
 
+# The message reported for each error code, built once.
+MESSAGES = {
+    code: sys.intern(f'{code.name} {code.value}') for code in ErrorCodes
+}
+
+
 def _error(line_number: int, column: int, error_code: ErrorCodes) -> tuple:
     """Format error report such that it's usable by flake8's reporting."""
-    return (line_number, column, f'{error_code.name} {error_code.value}', None)
+    return (line_number, column, MESSAGES[error_code], None)
 
 
 def get_left_pad(line: str) -> int:
@@ -34,80 +90,1630 @@ def get_left_pad(line: str) -> int:
     return len(line) - len(line.lstrip(' '))
 
 
-@attr.s(hash=False)
-class MultilineContainers:
-    """Ensure the consistency of multiline dict and list style."""
+# Opening and closing characters for every kind of container.
+BRACKETS = (('{', '}'), ('[', ']'), ('(', ')'))
 
-    name = 'flake8_multiline_containers'
-    version = '0.0.11'
 
-    tree = attr.ib(default=None)
-    filename = attr.ib(default="(none)")
-    lines = attr.ib(default=None)
+# The classes here are written out, rather than made with attrs, since flake8
+# imports every plugin and making them with attrs would be most of the time
+# that takes.
 
-    errors = attr.ib(factory=list)
 
-    # The column where the last line that opened started.
-    last_starts_at = attr.ib(factory=list)
+class LineScan:
+    """Everything the checks need to know about a single line.
 
-    # The number of functions deep we currently are in.
-    function_depth = attr.ib(default=0)
+    Lines share scans through the cache, so they mustn't be changed.
+    """
 
-    inside_conditional_block = attr.ib(default=0)
+    __slots__ = ('counts', 'function_calls', 'conditional_block')
 
-    def _number_of_matches_in_line(
-            self,
-            open_character: str,
-            close_character: str,
-            line: str) -> tuple:
-        """Scan line and check how many times each character appears.
+    def __init__(
+        self,
+        counts: dict,
+        function_calls: int = 0,
+        conditional_block: bool = False,
+    ):
+        # Number of (opening, closing) characters, keyed by opening character.
+        # Characters inside strings and comments are not counted.
+        self.counts = counts
 
-        Characters inside strings are ignored.
+        # Number of function calls or definitions that open on the line.
+        self.function_calls = function_calls
 
-        Arguments:
-            open_character: Opening character for the container.
-            close_character: Closing character for the container.
-            line: The line to check.
+        # If the line opens a conditional block.
+        self.conditional_block = conditional_block
 
-        Returns:
-            tuple
 
-        """
-        open_matches_in_string = 0
-        close_matches_in_string = 0
+# The scan of code without any container characters, which has nothing to
+# check.
+EMPTY_SCAN = LineScan(counts={opening: (0, 0) for opening, _ in BRACKETS})
+
+
+def strip_line(line: str, quote: str = None) -> tuple:
+    """Remove strings and comments from a line, leaving only the code.
+
+    Handles every kind of string prefix, since only the quotes matter.
+
+    Arguments:
+        line: The line to strip.
+        quote: The triple quote of a string the line starts inside of, if any.
+
+    Returns:
+        tuple: The code, and the triple quote of a string that continues onto
+            the next line, if any.
+
+    """
+    code = []
+    position = 0
+
+    while True:
+        if quote is not None:
+            end = TRIPLE_QUOTE_END_REGEX[quote].match(line, position)
+            if end is None:
+                return ''.join(code), quote
+
+            position = end.end()
+            quote = None
+
+        match = LEXICAL_REGEX.search(line, position)
+        if match is None:
+            code.append(line[position:])
+            return ''.join(code), None
+
+        code.append(line[position:match.start()])
+        if match.group('comment'):
+            return ''.join(code), None
+
+        position = match.end()
+        quote = match.group('triple')
+
+
+def scan_code(code: str) -> LineScan:
+    """Count every kind of container character in code.
+
+    Arguments:
+        code: A line with strings and comments already removed.
+
+    Returns:
+        LineScan
+
+    """
+    if BRACKET_REGEX.search(code) is None:
+        return EMPTY_SCAN
+
+    counts = {
+        opening: (code.count(opening), code.count(closing))
+        for opening, closing in _brackets
+    }
+
+    # Only lunula brackets are told apart from calls and conditions.
+    if '(' not in counts:
+        return LineScan(counts=counts)
+
+    return LineScan(
+        counts=counts,
+        function_calls=len(FUNCTION_CALL_REGEX.findall(code)),
+        conditional_block=CONDITIONAL_BLOCK_REGEX.search(code) is not None,
+    )
+
+
+def scan_line(line: str) -> LineScan:
+    """Scan a line on its own and count every kind of container character.
+
+    Arguments:
+        line: The line to scan.
+
+    Returns:
+        LineScan
+
+    """
+    code, _ = strip_line(line)
+    return scan_code(code)
+
+
+# Default number of lines whose scan results are kept.
+LINE_CACHE_SIZE = 4096
+
+
+def _scan_line_in_string(line: str, quote: str) -> tuple:
+    """Scan a line that may start inside a triple quoted string.
+
+    Returns:
+        tuple: The LineScan, and the triple quote of a string that continues
+            onto the next line, if any.
+
+    """
+    code, quote = strip_line(line, quote)
+    return scan_code(code), quote
+
+
+# Scan results for lines seen in any file, most recently used last.
+# Lines such as closing brackets and decorators repeat across every file.
+line_cache = functools.lru_cache(maxsize=LINE_CACHE_SIZE)(_scan_line_in_string)
+
+
+_line_cache_size = LINE_CACHE_SIZE
+
+
+def set_line_cache_size(size: int):
+    """Change how many lines are kept in the cache. 0 disables it.
+
+    The cache is only replaced, and emptied, if the size changes.
+    Hits and misses can be read from line_cache.cache_info().
+    """
+    global line_cache, _line_cache_size
+
+    if size != _line_cache_size:
+        line_cache = functools.lru_cache(maxsize=size)(_scan_line_in_string)
+        _line_cache_size = size
+
+
+OPENING_CHARACTERS = frozenset(opening for opening, _ in BRACKETS)
+CLOSING_CHARACTERS = frozenset(closing for _, closing in BRACKETS)
+
+# How each bracket changes how many are open.
+BRACKET_DEPTHS = dict.fromkeys(OPENING_CHARACTERS, 1)
+BRACKET_DEPTHS.update(dict.fromkeys(CLOSING_CHARACTERS, -1))
+
+
+class OpenContainer:
+    """A container found in the token stream that hasn't been closed yet."""
+
+    __slots__ = (
+        'row',
+        'column',
+        'pad',
+        'opening',
+        'ignored',
+        'awaiting_comma',
+        'content_row',
+    )
+
+    def __init__(
+        self,
+        row: int,
+        column: int,
+        pad: int,
+        opening: str = '(',
+        ignored: bool = False,
+        awaiting_comma: bool = False,
+        content_row: int = None,
+    ):
+        self.row = row
+        self.column = column
+
+        # Left padding of the line the container was opened on.
+        self.pad = pad
+
+        # The opening character.
+        self.opening = opening
+
+        # Function calls and definitions aren't containers.
+        self.ignored = ignored
+
+        # Lunula brackets only hold a tuple once a comma is found directly
+        # inside. Until then they're treated as wrapping an expression.
+        self.awaiting_comma = awaiting_comma
+
+        # The row where the first token inside the container starts.
+        self.content_row = content_row
+
+
+class Container:
+    """A container spread over several lines, found once it's closed.
+
+    Engines find every container in one pass over a file, and hand each one
+    to every rule. Rows count from 1 and columns from 0, in characters.
+    Rules mustn't change it. It isn't frozen, since frozen classes are
+    slower to make and there's one for every container.
+    """
+
+    __slots__ = (
+        'opening',
+        'row',
+        'column',
+        'pad',
+        'content_after_opening',
+        'close_row',
+        'close_column',
+    )
+
+    def __init__(
+        self,
+        opening: str,
+        row: int,
+        column: int,
+        pad: int,
+        content_after_opening: bool,
+        close_row: int,
+        close_column: int,
+    ):
+        # The opening character.
+        self.opening = opening
+
+        self.row = row
+        self.column = column
+
+        # Left padding of the line the container was opened on.
+        self.pad = pad
+
+        # If anything other than a comment follows the opening character on
+        # its line.
+        self.content_after_opening = content_after_opening
+
+        # Where the closing character is.
+        self.close_row = close_row
+        self.close_column = close_column
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        return self._fields() == other._fields()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(
+            f'{name}={getattr(self, name)!r}' for name in self.__slots__
+        )
+        return f'Container({fields})'
+
+
+# Every rule, by the error code it reports.
+RULES = {}
+
+
+# What set_selection chose to check. Everything, until it's called.
+_selected_codes = None
+_active_rules = RULES
+_brackets = BRACKETS
+_openings = OPENING_CHARACTERS
+_mapped_openings = frozenset(o.encode() for o in OPENING_CHARACTERS)
+
+
+def register_rule(code):
+    """Register a function as a rule that checks each container.
+
+    The function is called with a Container, and returns an error, or None.
+    Scanning line by line only checks JS101 and JS102, so files are
+    tokenized instead while other rules are registered.
+
+    Arguments:
+        code: What the rule reports, such as an ErrorCodes member.
+
+    """
+    def decorator(rule):
+        RULES[code] = rule
+        if _active_rules is not RULES and (
+            _code_name(code) in _selected_codes
+        ):
+            _active_rules[code] = rule
+
+        return rule
+
+    return decorator
+
+
+@register_rule(ErrorCodes.JS101)
+def _check_js101(container: Container) -> tuple:
+    if container.content_after_opening:
+        return _error(container.row, container.column, ErrorCodes.JS101)
+
+    return None
+
+
+@register_rule(ErrorCodes.JS102)
+def _check_js102(container: Container) -> tuple:
+    if container.close_column != container.pad:
+        return _error(
+            container.close_row, container.close_column, ErrorCodes.JS102,
+        )
+
+    return None
+
+
+# Rules that come with the plugin.
+BUILT_IN_RULES = frozenset(RULES)
+
+
+def _apply_rules(container: Container, errors: list):
+    """Check a container with every selected rule, adding the errors found."""
+    for rule in _active_rules.values():
+        error = rule(container)
+        if error is not None:
+            errors.append(error)
+
+
+def _code_name(code) -> str:
+    return getattr(code, 'name', code)
+
+
+def _chosen_brackets(brackets: str) -> tuple:
+    """Get the pairs of container characters given in a string.
+
+    Raises:
+        ValueError: If brackets holds anything but container characters, or
+            none of them.
+
+    """
+    characters = set(brackets) - {' ', ','}
+    unknown = characters - OPENING_CHARACTERS - CLOSING_CHARACTERS
+    chosen = tuple(pair for pair in BRACKETS if characters & set(pair))
+    if unknown or not chosen:
+        raise ValueError(f'Not a set of brackets: {brackets!r}')
+
+    return chosen
+
+
+def _brackets_option(value: str) -> str:
+    """Check the brackets given in the options, so flake8 says what's wrong."""
+    try:
+        _chosen_brackets(value)
+    except ValueError as e:
+        import argparse
+
+        raise argparse.ArgumentTypeError(str(e))
+
+    return value
+
+
+def set_selection(codes=None, brackets: str = None):
+    """Only check for some error codes, in some kinds of container.
+
+    Work that can only find errors that won't be reported is skipped. The
+    line cache is emptied if the kinds of container change, since lines
+    are scanned for those only.
+
+    Arguments:
+        codes: Names of the codes to report, such as 'JS101', or None for
+            every code. Rules registered later are only checked if their
+            code is one of them.
+        brackets: Characters of the containers to check, such as '{}[]', or
+            None for all of them.
+
+    Raises:
+        ValueError: If brackets holds anything but container characters, or
+            none of them.
+
+    """
+    global _selected_codes, _active_rules, _brackets, _openings
+    global _mapped_openings, BRACKET_REGEX, PREFILTER_REGEX
+
+    chosen = BRACKETS if brackets is None else _chosen_brackets(brackets)
+
+    if codes is None:
+        _selected_codes = None
+        _active_rules = RULES
+    else:
+        _selected_codes = frozenset(codes)
+        _active_rules = {
+            code: rule for code, rule in RULES.items()
+            if _code_name(code) in _selected_codes
+        }
+
+    if chosen != _brackets:
+        _brackets = chosen
+        _openings = frozenset(opening for opening, _ in chosen)
+        _mapped_openings = frozenset(o.encode() for o in _openings)
+
+        characters = re.escape(''.join(o + c for o, c in chosen))
+        BRACKET_REGEX = _LazyPattern(f'[{characters}]')
+        PREFILTER_REGEX = _LazyPattern(f'[{characters}\'"]')
+        line_cache.cache_clear()
+
+
+def _selection() -> tuple:
+    """Get what's selected, for keys of cached results."""
+    codes = None if _selected_codes is None else sorted(_selected_codes)
+    return codes, ''.join(opening for opening, _ in _brackets)
+
+
+def _selected_codes_from(options) -> set:
+    """Get the names of the codes flake8 will report, or None for all."""
+    try:
+        from flake8.style_guide import Decision, DecisionEngine
+
+        decide = DecisionEngine(options).decision_for
+    except (ImportError, AttributeError):
+        return None
+
+    codes = {code.name for code in ErrorCodes}
+    codes.update(_code_name(code) for code in RULES)
+    return {code for code in codes if decide(code) is Decision.Selected}
+
+
+def _check_closed_container(
+    container: OpenContainer,
+    token: tokenize.TokenInfo,
+    errors: list,
+    changed_lines: list = None,
+):
+    """Check a container with every rule once its closing is found."""
+    row, column = token.start
+
+    if container.ignored or container.awaiting_comma or row == container.row:
+        return
+
+    if changed_lines is not None and not _touches(
+        changed_lines, container.row, row,
+    ):
+        return
+
+    _apply_rules(Container(
+        opening=container.opening,
+        row=container.row,
+        column=container.column,
+        pad=container.pad,
+        content_after_opening=container.content_row == container.row,
+        close_row=row,
+        close_column=column,
+    ), errors)
+
+
+def _follows_callable(previous: tokenize.TokenInfo) -> bool:
+    """Check if a token is something that can be called or defined."""
+    if previous is None:
+        return False
+
+    if previous.type == tokenize.NAME:
+        return not keyword.iskeyword(previous.string)
+
+    return previous.string in (')', ']')
+
+
+# How far into an f-string each token type that starts or ends one goes.
+# Their replacement fields are tokenized from Python 3.12, as are template
+# strings from 3.14. Brackets in them are part of the string, as they are
+# for every other engine. Empty before 3.12, when the f-string is one token.
+F_STRING_DEPTHS = {
+    getattr(tokenize, name): depth
+    for name, depth in (
+        ('FSTRING_START', 1),
+        ('FSTRING_END', -1),
+        ('TSTRING_START', 1),
+        ('TSTRING_END', -1),
+    )
+    if hasattr(tokenize, name)
+}
+
+
+def check_tokens(
+    tokens: list,
+    lines: list,
+    changed_lines: list = None,
+) -> list:
+    """Check JS101 and JS102 using the tokens of a whole file.
+
+    Strings and comments are already separate tokens, so only operator
+    tokens are inspected for container characters. A lunula bracket that
+    follows a name, a closing lunula bracket, or a closing square bracket
+    belongs to a function call or definition and is not treated as a
+    container. Any other lunula bracket is only a tuple if it directly
+    contains a comma, which leaves out wrapped expressions such as
+    conditional blocks.
+
+    Arguments:
+        tokens: The tokens for the file, as produced by tokenize.
+        lines: The lines of the file.
+        changed_lines: Sorted line numbers. If given, only containers that
+            touch one of them are checked.
+
+    Returns:
+        list of errors
+
+    """
+    return list(_token_errors(tokens, lines, changed_lines))
+
+
+def _token_errors(
+    tokens: list,
+    lines: list,
+    changed_lines: list = None,
+) -> iter:
+    """Yield the errors check_tokens finds, as each container is closed.
+
+    A None in the tokens is yielded back as it is, so a caller can pause
+    between tokens.
+    """
+    errors = []
+    stack = []
+    previous = None
+
+    if F_STRING_DEPTHS:
+        tokens = _outside_f_strings(tokens)
+
+    for token in tokens:
+        if token is None:
+            yield None
+            continue
+
+        if token.type in (tokenize.COMMENT, tokenize.NL):
+            continue
+
+        if stack and stack[-1].content_row is None:
+            stack[-1].content_row = token.start[0]
+
+        if token.type == tokenize.OP:
+            if token.string in OPENING_CHARACTERS:
+                row, column = token.start
+                lunula = token.string == '('
+                ignored = token.string not in _openings or (
+                    lunula and _follows_callable(previous)
+                )
+                stack.append(OpenContainer(
+                    row=row,
+                    column=column,
+                    pad=get_left_pad(lines[row - 1]),
+                    opening=token.string,
+                    ignored=ignored,
+                    awaiting_comma=lunula and not ignored,
+                ))
+
+            elif token.string == ',' and stack:
+                stack[-1].awaiting_comma = False
+
+            elif token.string in CLOSING_CHARACTERS and stack:
+                _check_closed_container(
+                    stack.pop(), token, errors, changed_lines,
+                )
+                yield from errors
+                errors.clear()
+
+        previous = token
+
+
+def _outside_f_strings(tokens) -> iter:
+    """Leave out the tokens inside f-strings, but not their start and end."""
+    depth = 0
+    for token in tokens:
+        outside = not depth
+        if token is not None:
+            depth += F_STRING_DEPTHS.get(token.type, 0)
+
+        if outside or not depth:
+            yield token
+
+
+# AST nodes that are written with container characters.
+CONTAINER_NODES = (
+    ast.Dict,
+    ast.DictComp,
+    ast.List,
+    ast.ListComp,
+    ast.Set,
+    ast.SetComp,
+    ast.Tuple,
+)
+
+# Patterns in match statements were added in Python 3.10
+if hasattr(ast, 'MatchSequence'):
+    CONTAINER_NODES += (ast.MatchMapping, ast.MatchSequence)
+
+# AST nodes for f-strings. Brackets in their replacement fields are part of
+# the string, as they are for every other engine.
+F_STRING_NODES = (ast.JoinedStr,)
+
+# Template strings were added in Python 3.14
+if hasattr(ast, 'TemplateStr'):
+    F_STRING_NODES += (ast.TemplateStr,)
+
+# End positions for AST nodes were added in Python 3.8
+AST_HAS_END_POSITIONS = sys.version_info >= (3, 8)
+
+# Matches anything other than whitespace and escaped newlines.
+CODE_CHARACTER_REGEX = _LazyPattern(r'[^\s\\]')
+
+CLOSING_FOR = dict(BRACKETS)
+
+
+def _character_column(line: str, offset: int) -> int:
+    """Convert an AST column offset, counted in UTF-8 bytes, to an index."""
+    if line.isascii():
+        return offset
+
+    return len(line.encode('utf-8')[:offset].decode('utf-8'))
+
+
+def _start(node: ast.AST, lines: list) -> tuple:
+    """Get the row and column of the first character of a node."""
+    return node.lineno, _character_column(
+        lines[node.lineno - 1], node.col_offset,
+    )
+
+
+def _last(node: ast.AST, lines: list) -> tuple:
+    """Get the row and column of the last character of a node."""
+    return node.end_lineno, _character_column(
+        lines[node.end_lineno - 1], node.end_col_offset,
+    ) - 1
+
+
+def _next_character(lines: list, row: int, column: int) -> tuple:
+    """Find the next character of code, from a row and column onwards.
+
+    Only whitespace, comments, and escaped newlines are skipped, so this is
+    only used between the parts of a node, where there are no strings.
+    """
+    while row <= len(lines):
+        match = CODE_CHARACTER_REGEX.search(lines[row - 1], column)
+        if match is not None and match.group() != '#':
+            return row, match.start()
+
+        row, column = row + 1, 0
+
+    return None
+
+
+def _step(lines: list, position: tuple, characters: str) -> tuple:
+    """Skip over any of the characters, and anything between them."""
+    count = 0
+    while position is not None:
+        row, column = position
+        if lines[row - 1][column] not in characters:
+            break
+
+        count += 1
+        position = _next_character(lines, row, column + 1)
+
+    return position, count
+
+
+def _after(lines: list, position: tuple) -> tuple:
+    """Find the next character of code after a position."""
+    row, column = position
+    return _next_character(lines, row, column + 1)
+
+
+def _bracket_after(node: ast.AST, lines: list) -> tuple:
+    """Find the first character after a node, past any lunula brackets."""
+    position, _ = _step(lines, _after(lines, _last(node, lines)), ')')
+    return position
+
+
+def _bracket_pair(lines: list, opening: tuple, closing: tuple) -> tuple:
+    """Check that a matching pair of container characters is at each end."""
+    if opening is None or closing is None:
+        return None
+
+    opening_character = lines[opening[0] - 1][opening[1]]
+    closing_character = lines[closing[0] - 1][closing[1]]
+    if CLOSING_FOR.get(opening_character) != closing_character:
+        return None
+
+    return opening, closing
+
+
+def _is_bracketed(node: ast.AST, lines: list) -> bool:
+    """Check if a tuple, or a sequence pattern, is within its own brackets.
+
+    Without brackets it starts with its first element. That element can be
+    within lunula brackets of its own though, and then the brackets are only
+    the tuple's if more of them are opened before the element than are
+    closed after it.
+    """
+    elements = node.elts if isinstance(node, ast.Tuple) else node.patterns
+    if not elements:
+        return True
+
+    start = _start(node, lines)
+    if start == _start(elements[0], lines):
+        return False
+
+    if lines[start[0] - 1][start[1]] == '[':
+        return True
+
+    _, opened = _step(lines, start, '(')
+    _, closed = _step(lines, _after(lines, _last(elements[0], lines)), ')')
+    return opened > closed
+
+
+def _container_brackets(node: ast.AST, lines: list) -> tuple:
+    """Find the brackets of a node that is written as a container."""
+    is_sequence = isinstance(node, ast.Tuple) or (
+        type(node).__name__ == 'MatchSequence'
+    )
+    if is_sequence and not _is_bracketed(node, lines):
+        return None
+
+    return _bracket_pair(lines, _start(node, lines), _last(node, lines))
+
+
+def _subscript_brackets(node: ast.Subscript, lines: list) -> tuple:
+    """Find the square brackets of a subscript."""
+    return _bracket_pair(
+        lines, _bracket_after(node.value, lines), _last(node, lines),
+    )
+
+
+def _import_brackets(node: ast.ImportFrom, lines: list) -> tuple:
+    """Find the lunula brackets around the names imported from a module."""
+    # Nothing before them can be a lunula bracket, or a comment.
+    row, column = _start(node, lines)
+    while row <= node.end_lineno:
+        column = lines[row - 1].find('(', column)
+        if column != -1:
+            return _bracket_pair(lines, (row, column), _last(node, lines))
+
+        row, column = row + 1, 0
+
+    return None
+
+
+def _generator_brackets(node: ast.GeneratorExp, lines: list) -> tuple:
+    """Find the lunula brackets of a generator expression.
+
+    As with the tokens, they only hold a tuple if a comma is directly inside
+    them, which is only the case for a target without brackets.
+    """
+    for generator in node.generators:
+        target = generator.target
+        if isinstance(target, ast.Tuple) and not _is_bracketed(target, lines):
+            return _container_brackets(node, lines)
+
+    return None
+
+
+def _with_brackets(node: ast.AST, lines: list) -> tuple:
+    """Find the lunula brackets around the items of a with statement.
+
+    As with the tokens, they're only treated as a container when a comma is
+    directly inside them.
+    """
+    row, column = _start(node, lines)
+    if isinstance(node, ast.AsyncWith):
+        row, column = _next_character(lines, row, column + len('async'))
+
+    opening = _next_character(lines, row, column + len('with'))
+    first = node.items[0]
+    row, column = _after(lines, _last(
+        first.optional_vars or first.context_expr, lines,
+    ))
+    if lines[row - 1][column] != ',' or (
+        _start(first.context_expr, lines) <= opening
+    ):
+        return None
+
+    # A trailing comma can come before the closing character.
+    last = node.items[-1]
+    closing, _ = _step(lines, _after(lines, _last(
+        last.optional_vars or last.context_expr, lines,
+    )), ',')
+    return _bracket_pair(lines, opening, closing)
+
+
+@functools.lru_cache(maxsize=None)
+def _bracket_finders() -> dict:
+    """Get how to find the container characters of each kind of node.
+
+    Only nodes written with container characters have one. Made on first
+    use, since only the tree engine needs it.
+    """
+    finders = dict.fromkeys(CONTAINER_NODES, _container_brackets)
+    finders.update({
+        ast.AsyncWith: _with_brackets,
+        ast.GeneratorExp: _generator_brackets,
+        ast.ImportFrom: _import_brackets,
+        ast.Subscript: _subscript_brackets,
+        ast.With: _with_brackets,
+    })
+    return finders
+
+
+def _call_generator(node: ast.Call, lines: list) -> ast.GeneratorExp:
+    """Get a generator expression that shares the brackets of a call."""
+    if len(node.args) != 1 or node.keywords:
+        return None
+
+    argument, = node.args
+    if not isinstance(argument, ast.GeneratorExp):
+        return None
+
+    if _start(argument, lines) != _bracket_after(node.func, lines):
+        return None
+
+    return argument
+
+
+def _touches(changed_lines: list, first: int, last: int) -> bool:
+    """Check if any of the sorted changed lines are between first and last."""
+    i = bisect.bisect_left(changed_lines, first)
+    return i < len(changed_lines) and changed_lines[i] <= last
+
+
+def _multiline_nodes(tree: ast.AST, changed_lines: list = None):
+    """Yield every node in the tree that spans more than one line.
+
+    A node on a single line can't contain a node that spans several lines,
+    so those subtrees are never visited. Neither are f-strings, nor nodes
+    that don't touch any of the changed lines, if given.
+    """
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        end_lineno = getattr(node, 'end_lineno', None)
+        if end_lineno is not None:
+            if end_lineno == node.lineno or isinstance(node, F_STRING_NODES):
+                continue
+
+            if changed_lines is not None and not _touches(
+                changed_lines, node.lineno, end_lineno,
+            ):
+                continue
+
+            yield node
+
+        nodes.extend(ast.iter_child_nodes(node))
+
+
+def check_tree(
+    tree: ast.AST,
+    lines: list,
+    changed_lines: list = None,
+) -> list:
+    """Check JS101 and JS102 using the AST of a whole file.
+
+    Only nodes that are written with container characters and span more than
+    one line are checked. Function calls, definitions, and conditional blocks
+    aren't containers in the AST, so they never need to be told apart from
+    tuples. The same containers are found as with the tokens: subscripts,
+    names imported within brackets, and lunula brackets that directly hold a
+    comma are containers too. Lunula brackets around a lambda, or a yield of
+    a tuple, are the exception since they aren't part of any node, as are
+    sequence patterns after a case, which the tokens take for a call.
+    Nothing inside an f-string is checked. Requires Python 3.8 or later.
+
+    Arguments:
+        tree: The AST for the file.
+        lines: The lines of the file.
+        changed_lines: Sorted line numbers. If given, only containers that
+            touch one of them are checked.
+
+    Returns:
+        list of errors
+
+    """
+    errors = []
+    in_calls = set()
+    finders = _bracket_finders()
+
+    for node in _multiline_nodes(tree, changed_lines):
+        if isinstance(node, ast.Call):
+            in_calls.add(_call_generator(node, lines))
+
+        finder = finders.get(type(node))
+        if finder is None or node in in_calls:
+            continue
+
+        # Tuples without brackets, and the like, have none to find.
+        brackets = finder(node, lines)
+        if brackets is None:
+            continue
+
+        (row, column), (close_row, close_column) = brackets
+        opening_line = lines[row - 1]
+        opening = opening_line[column]
+        if row == close_row or opening not in _openings:
+            continue
+
+        after_opening = opening_line[column + 1:].strip()
+        _apply_rules(Container(
+            opening=opening,
+            row=row,
+            column=column,
+            pad=get_left_pad(opening_line),
+            content_after_opening=bool(after_opening) and (
+                not after_opening.startswith('#')
+            ),
+            close_row=close_row,
+            close_column=close_column,
+        ), errors)
+
+    return errors
+
+
+# Files with more opening characters per line than this are cheaper to check
+# with NumPy than to parse, despite the time it takes to import it.
+DENSE_FILE_THRESHOLD = 1.0
+
+
+class Engine:
+    """A way to find containers, along with how fast it has been so far."""
+
+    def __init__(
+        self,
+        name: str,
+        check,
+        available: bool = True,
+        all_rules: bool = True,
+    ):
+        self.name = name
+
+        # Called with the checker. Adds any errors found to checker.errors.
+        self.check = check
+
+        self.available = available
+
+        # If containers are checked with every rule. Otherwise only JS101 and
+        # JS102 are checked.
+        self.all_rules = all_rules
+
+        self.lines_checked = 0
+        self.seconds = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Get the number of lines checked per second."""
+        if not self.seconds:
+            return 0.0
+
+        return self.lines_checked / self.seconds
+
+    def run(self, checker: 'MultilineContainers'):
+        """Check a file and record how long it took."""
+        start = time.perf_counter()
+        self.check(checker)
+        self.seconds += time.perf_counter() - start
+        self.lines_checked += len(checker.lines)
+
+
+# Every engine, by name.
+ENGINES = {}
+
+
+def register_engine(
+    name: str,
+    available: bool = True,
+    all_rules: bool = True,
+):
+    """Register a function as an engine that can be selected by name."""
+    def decorator(check):
+        ENGINES[name] = Engine(
+            name=name, check=check, available=available, all_rules=all_rules,
+        )
+        return check
+
+    return decorator
 
-        # Whole line is a comment, so ignore it
-        if re.search(r'^\s*#', line):
-            return 0, 0
 
-        # Find comments and make sure they're ignored
-        # Remove strings from temp_line
-        temp_line = STRING_REGEX.sub('', line)
+@register_engine('lines', all_rules=False)
+def _check_with_lines(checker: 'MultilineContainers'):
+    checker.check_lines()
 
-        # Find comments in temp_line, remove them from line
-        last_line = temp_line
-        for match in re.finditer(r'#.*', temp_line):
-            i = match.group(0)
-            if i is not None:
-                last_line = last_line.replace(i, '')
 
-        line = last_line
+@register_engine('tokens')
+def _check_with_tokens(checker: 'MultilineContainers'):
+    tokens = checker.file_tokens
+    if tokens is None:
+        tokens = tokenize.generate_tokens(iter(checker.lines).__next__)
 
-        # Find strings and make sure they're ignored
-        for match in STRING_REGEX.finditer(line):
-            i = match.group(0)
-            if i is not None:
-                open_matches_in_string += i.count(open_character)
-                close_matches_in_string += i.count(close_character)
+    checker.errors.extend(check_tokens(tokens, checker.lines))
 
-        open_times = line.count(open_character)
-        close_times = line.count(close_character)
 
-        # Any time the open or close character appear in a string, ignore them.
-        open_times -= open_matches_in_string
-        close_times -= close_matches_in_string
+@register_engine('tree', available=AST_HAS_END_POSITIONS)
+def _check_with_tree(checker: 'MultilineContainers'):
+    tree = checker.tree
+    if tree is None:
+        tree = ast.parse(''.join(checker.lines))
 
-        return open_times, close_times
+    checker.errors.extend(check_tree(tree, checker.lines))
+
+
+@register_engine('numpy')
+def _check_with_numpy(checker: 'MultilineContainers'):
+    source = ''.join(checker.lines).encode('utf-8', 'surrogatepass')
+    try:
+        errors = check_numpy(source)
+    except (ImportError, tokenize.TokenError):
+        # Without NumPy, or for code it can't follow, check with tokens.
+        _check_with_tokens(checker)
+    else:
+        checker.errors.extend(errors)
+
+
+@functools.lru_cache(maxsize=None)
+def _numpy_installed() -> bool:
+    """Check if NumPy can be imported, without importing it."""
+    import importlib.util
+
+    return importlib.util.find_spec('numpy') is not None
+
+
+def select_engine(checker: 'MultilineContainers') -> Engine:
+    """Pick the cheapest engine for a file.
+
+    Only engines that find the same containers are picked from, so that the
+    errors never depend on which one is picked. The lines engine finds
+    different ones, so is only used when asked for. An AST or tokens already
+    made by flake8 cost nothing extra, so they're used when given.
+    Otherwise, NumPy checks a file dense with containers much faster than it
+    can be parsed.
+    """
+    tree_engine = ENGINES['tree']
+
+    if checker.tree is not None and tree_engine.available:
+        return tree_engine
+
+    if checker.file_tokens is not None:
+        return ENGINES['tokens']
+
+    source = ''.join(checker.lines)
+    opening_count = sum(source.count(c) for c in OPENING_CHARACTERS)
+    if opening_count >= DENSE_FILE_THRESHOLD * len(checker.lines) and (
+        _numpy_installed()
+    ):
+        return ENGINES['numpy']
+
+    if tree_engine.available:
+        return tree_engine
+
+    return ENGINES['tokens']
+
+
+# Default number of files whose results are kept in a cache directory.
+RESULT_CACHE_MAX_ENTRIES = 10000
+
+
+class ResultCache:
+    """Errors found in files, kept on disk between runs.
+
+    Entries are keyed on the content of a file and anything else that can
+    change its errors. Each entry is written to a temporary file and then
+    moved into place, so workers sharing the directory never read a partial
+    entry. Once there are too many entries the oldest are removed.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+    ):
+        self.directory = directory
+        self.max_entries = max_entries
+
+        # Results from this process, so identical files are only checked
+        # once.
+        self.memory = {}
+
+        # Entries written since the directory was last pruned.
+        self.writes = 0
+
+    @staticmethod
+    def key(lines: list, *config) -> str:
+        """Get the key for a file's lines and the config used to check it."""
+        import hashlib
+
+        digest = hashlib.sha256(repr(config).encode('utf-8'))
+        digest.update(''.join(lines).encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key: str) -> list:
+        """Get the errors for a key, or None if they aren't cached."""
+        errors = self.memory.get(key)
+        if errors is not None:
+            return errors
+
+        try:
+            with open(self._path(key)) as f:
+                errors = [tuple(e) for e in json.load(f)]
+        except (OSError, ValueError):
+            return None
+
+        self.memory[key] = errors
+        return errors
+
+    def set(self, key: str, errors: list):
+        """Store the errors for a key."""
+        # The checker's list is cleared when it's reused.
+        self.memory[key] = list(errors)
+
+        os.makedirs(self.directory, exist_ok=True)
+        import tempfile
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(errors, f)
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        # Listing the directory is slow, so only prune once in a while.
+        self.writes += 1
+        if self.writes >= max(self.max_entries // 10, 1):
+            self.writes = 0
+            self.prune()
+
+    def prune(self):
+        """Remove the oldest entries until there are at most max_entries."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                # Another worker already removed it.
+                pass
+
+
+# Functions and MultilineContainers methods timed when profiling.
+PROFILED_FUNCTIONS = (
+    'strip_line',
+    'scan_code',
+    'check_tokens',
+    'check_tree',
+    'check_mapped',
+    'select_engine',
+)
+PROFILED_METHODS = ('_check_opening', '_check_closing')
+
+# Set by the process that starts profiling, so that worker processes know
+# where to leave their results.
+PROFILE_DIRECTORY_VARIABLE = 'MULTILINE_CONTAINERS_PROFILE_DIR'
+
+
+class Profile:
+    """Time spent in each phase of checking, gathered from every process.
+
+    Worker processes write their results to a shared directory when they
+    exit. The process that started profiling adds them to its own and prints
+    the totals when it exits.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        owner_pid: int = None,
+        dump: str = None,
+        slowest: int = 0,
+        slow_line: float = None,
+    ):
+        self.directory = directory
+
+        # The process that started profiling. None in spawned workers.
+        self.owner_pid = owner_pid
+
+        # Where to write cProfile stats, if anywhere.
+        self.dump = dump
+
+        # Number of the slowest files to list.
+        self.slowest = slowest
+
+        # Seconds a line must take to scan before it is listed, if listing.
+        self.slow_line = slow_line
+
+        # Phase name to [calls, seconds], for this process.
+        self.phases = {}
+
+        # [filename, lines, seconds] for every file checked by this process.
+        self.files = []
+
+        # [filename, line number, length, brackets, seconds] for each slow
+        # line.
+        self.slow_lines = []
+
+        self.profiler = None
+
+    def start(self):
+        """Start profiling the current process until it exits."""
+        import multiprocessing.util
+
+        self.phases = {}
+        self.files = []
+        self.slow_lines = []
+
+        # A forked worker starts with its parent's profiler still running.
+        if self.profiler is not None:
+            self.profiler.disable()
+
+        if self.dump is not None:
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+        multiprocessing.util.Finalize(self, self.finish, exitpriority=10)
+
+        # Forked workers don't keep their parent's finalizers.
+        multiprocessing.util.register_after_fork(self, Profile.start)
+
+    def finish(self):
+        """Stop profiling, then leave or report the results."""
+        import heapq
+
+        if self.profiler is not None:
+            self.profiler.disable()
+
+        results = {
+            'phases': self.phases,
+            'engines': {
+                name: [e.lines_checked, e.seconds]
+                for name, e in ENGINES.items()
+            },
+            'files': heapq.nlargest(
+                self.slowest, self.files, key=lambda f: f[2],
+            ),
+            'slow_lines': self.slow_lines,
+        }
+
+        path = os.path.join(self.directory, str(os.getpid()))
+        if os.getpid() != self.owner_pid:
+            with open(f'{path}.json', 'w') as f:
+                json.dump(results, f)
+            if self.profiler is not None:
+                self.profiler.dump_stats(f'{path}.prof')
+            return
+
+        self.report(results)
+
+    def report(self, results: dict):
+        """Print the totals for every process, then clean up."""
+        import glob
+        import heapq
+        import shutil
+
+        everything = [results]
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            with open(path) as f:
+                everything.append(json.load(f))
+
+        phases = {}
+        engines = {}
+        files = []
+        slow_lines = []
+        for r in everything:
+            for totals, key in ((phases, 'phases'), (engines, 'engines')):
+                for name, (count, seconds) in r[key].items():
+                    total = totals.setdefault(name, [0, 0.0])
+                    total[0] += count
+                    total[1] += seconds
+
+            files.extend(r['files'])
+            slow_lines.extend(r['slow_lines'])
+
+        print(
+            f'flake8-multiline-containers profile, '
+            f'{len(everything)} process(es)',
+            f"{'phase':<16} {'calls':>10} {'seconds':>10} {'us/call':>10}",
+            *(
+                f'{name:<16} {count:>10} {seconds:>10.3f} '
+                f'{seconds / count * 1e6:>10.2f}'
+                for name, (count, seconds) in sorted(phases.items())
+            ),
+            f"{'engine':<16} {'lines':>10} {'seconds':>10} {'lines/s':>10}",
+            *(
+                f'{name:<16} {count:>10} {seconds:>10.3f} '
+                f'{count / seconds:>10.0f}'
+                for name, (count, seconds) in sorted(engines.items())
+                if seconds
+            ),
+            sep='\n',
+            file=sys.stderr,
+        )
+
+        if self.slowest:
+            print(
+                f"{'seconds':>10} {'lines':>10} {'lines/s':>10} file",
+                *(
+                    f'{seconds:>10.3f} {count:>10} '
+                    f'{count / seconds if seconds else 0:>10.0f} {filename}'
+                    for filename, count, seconds in heapq.nlargest(
+                        self.slowest, files, key=lambda f: f[2],
+                    )
+                ),
+                sep='\n',
+                file=sys.stderr,
+            )
+
+        if self.slow_line is not None:
+            print(
+                f"{'ms':>10} {'length':>10} {'brackets':>10} line",
+                *(
+                    f'{seconds * 1e3:>10.3f} {length:>10} {brackets:>10} '
+                    f'{filename}:{line_number}'
+                    for filename, line_number, length, brackets, seconds
+                    in sorted(slow_lines, key=lambda f: f[4], reverse=True)
+                ),
+                sep='\n',
+                file=sys.stderr,
+            )
+
+        if self.profiler is not None:
+            import pstats
+
+            stats = pstats.Stats(self.profiler)
+            for path in glob.glob(os.path.join(self.directory, '*.prof')):
+                stats.add(path)
+            stats.dump_stats(self.dump)
+
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.environ.pop(PROFILE_DIRECTORY_VARIABLE, None)
+
+
+# The profile for this process, while profiling.
+_profile = None
+
+
+def _timed(name: str, function):
+    """Wrap a function so its calls are added to the profile."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            phase = _profile.phases.setdefault(name, [0, 0.0])
+            phase[0] += 1
+            phase[1] += time.perf_counter() - start
+
+    return wrapper
+
+
+def _timed_run(run):
+    """Wrap MultilineContainers.run so the time for each file is kept."""
+    @functools.wraps(run)
+    def wrapper(self):
+        start = time.perf_counter()
+        errors = list(run(self))
+        _profile.files.append([
+            self.filename, len(self.lines), time.perf_counter() - start,
+        ])
+        yield from errors
+
+    return wrapper
+
+
+def _timed_check_line(check_line):
+    """Wrap MultilineContainers.check_line so slow lines are kept."""
+    @functools.wraps(check_line)
+    def wrapper(self, line_number, line, quote):
+        start = time.perf_counter()
+        try:
+            return check_line(self, line_number, line, quote)
+        finally:
+            seconds = time.perf_counter() - start
+            if seconds >= _profile.slow_line:
+                brackets = sum(map(line.count, OPENING_CHARACTERS))
+                brackets += sum(map(line.count, CLOSING_CHARACTERS))
+                _profile.slow_lines.append([
+                    self.filename, line_number + 1, len(line), brackets,
+                    seconds,
+                ])
+
+    return wrapper
+
+
+def enable_profiling(
+    dump: str = None,
+    slowest: int = 0,
+    slow_line: float = None,
+):
+    """Time every phase of checking until the process exits.
+
+    Nothing is timed until this is called, so there's no cost otherwise.
+
+    Arguments:
+        dump: Path to write cProfile stats to, if any.
+        slowest: Number of the slowest files to list.
+        slow_line: List lines that take at least this many seconds to
+            scan. Only the lines engine scans line by line.
+
+    """
+    global _profile
+
+    if _profile is not None:
+        return
+
+    module = sys.modules[__name__]
+    for name in PROFILED_FUNCTIONS:
+        setattr(module, name, _timed(name, getattr(module, name)))
+    for name in PROFILED_METHODS:
+        function = getattr(MultilineContainers, name)
+        setattr(MultilineContainers, name, _timed(name, function))
+
+    if slowest:
+        run = _timed_run(MultilineContainers.run)
+        MultilineContainers.run = run
+
+    if slow_line is not None:
+        check_line = _timed_check_line(MultilineContainers.check_line)
+        MultilineContainers.check_line = check_line
+
+    options = {'dump': dump, 'slowest': slowest, 'slow_line': slow_line}
+    directory = os.environ.get(PROFILE_DIRECTORY_VARIABLE)
+    if directory is None:
+        import tempfile
+
+        directory = tempfile.mkdtemp(prefix='multiline-containers-profile-')
+        os.environ[PROFILE_DIRECTORY_VARIABLE] = directory
+        _profile = Profile(directory, owner_pid=os.getpid(), **options)
+
+    else:
+        _profile = Profile(directory, **options)
+
+    _profile.start()
+
+
+class MultilineContainers:
+    """Ensure the consistency of multiline dict and list style.
+
+    flake8 makes a checker for each file. Outside of flake8, one checker can
+    check many files by calling reset before each.
+    """
+
+    name = 'flake8_multiline_containers'
+    version = '1.0.0'
+
+    __slots__ = (
+        'tree',
+        'filename',
+        'lines',
+        'file_tokens',
+        'errors',
+        'last_starts_at',
+        'function_depth',
+        'inside_conditional_block',
+        'engine',
+    )
+
+    def __init__(
+        self,
+        tree: ast.AST = None,
+        filename: str = "(none)",
+        lines: list = None,
+        file_tokens: list = None,
+        engine: str = None,
+    ):
+        self.errors = []
+
+        # The column where the last line that opened started.
+        self.last_starts_at = array.array('l')
+
+        # Everything else, including the number of functions deep we
+        # currently are in, is set by reset.
+        self.reset(filename, lines, tree, file_tokens, engine)
+
+    # The engine chosen in the options.
+    default_engine = 'auto'
+
+    # Errors kept between runs, if a cache directory was given.
+    result_cache = None
+
+    @classmethod
+    def add_options(cls, parser):
+        """Register the plugin's options with flake8."""
+        names = [name for name, e in ENGINES.items() if e.available]
+        parser.add_option(
+            '--multiline-containers-engine',
+            default='auto',
+            choices=['auto', *names],
+            parse_from_config=True,
+            help=f'How containers are found: auto, {", ".join(names)}. '
+                 '(Default: auto)',
+        )
+        parser.add_option(
+            '--multiline-containers-cache-size',
+            default=LINE_CACHE_SIZE,
+            type=int,
+            parse_from_config=True,
+            help='Number of scanned lines kept between files when scanning '
+                 'line by line. 0 disables the cache. '
+                 f'(Default: {LINE_CACHE_SIZE})',
+        )
+        parser.add_option(
+            '--multiline-containers-profile',
+            action='store_true',
+            parse_from_config=True,
+            help='Print the time spent in each phase of checking at exit.',
+        )
+        parser.add_option(
+            '--multiline-containers-profile-dump',
+            default=None,
+            help='Also write cProfile stats for the run to this file.',
+        )
+        parser.add_option(
+            '--multiline-containers-profile-slowest',
+            default=0,
+            type=int,
+            metavar='N',
+            help='Profile, and list the N files that took longest to check.',
+        )
+        parser.add_option(
+            '--multiline-containers-profile-slow-line',
+            default=None,
+            type=float,
+            metavar='MS',
+            help='Profile, and list lines that took at least MS milliseconds '
+                 'to scan. Only the lines engine scans line by line.',
+        )
+        parser.add_option(
+            '--multiline-containers-brackets',
+            default=''.join(o + c for o, c in BRACKETS),
+            type=_brackets_option,
+            parse_from_config=True,
+            help='Kinds of container to check, such as {}[] to leave out '
+                 'tuples. With the lines engine, leaving out tuples can '
+                 'change which errors the others have. (Default: all)',
+        )
+        parser.add_option(
+            '--multiline-containers-cache-dir',
+            default=None,
+            parse_from_config=True,
+            help='Directory to keep results in between runs. Files that '
+                 'have not changed since are not checked again. '
+                 '(Default: no cache)',
+        )
+
+    @classmethod
+    def parse_options(cls, options):
+        """Store the options flake8 parsed."""
+        cls.default_engine = options.multiline_containers_engine
+        set_line_cache_size(options.multiline_containers_cache_size)
+        set_selection(
+            _selected_codes_from(options),
+            options.multiline_containers_brackets,
+        )
+
+        dump = options.multiline_containers_profile_dump
+        slowest = options.multiline_containers_profile_slowest
+        slow_line = options.multiline_containers_profile_slow_line
+        if slow_line is not None:
+            slow_line /= 1000
+
+        profile = options.multiline_containers_profile
+        if profile or dump or slowest or slow_line is not None:
+            enable_profiling(dump, slowest, slow_line)
+
+        cache_dir = options.multiline_containers_cache_dir
+        cache = cls.result_cache
+        if cache_dir is None:
+            cls.result_cache = None
+
+        elif cache is None or cache.directory != cache_dir:
+            cls.result_cache = ResultCache(directory=cache_dir)
+
+    def reset(
+        self,
+        filename: str = "(none)",
+        lines: list = None,
+        tree: ast.AST = None,
+        file_tokens: list = None,
+        engine: str = None,
+    ) -> 'MultilineContainers':
+        """Prepare to check another file, reusing the checker's storage.
+
+        Errors from the previous file are cleared, so they must be copied
+        first if they're still needed. The engine is the name of the one used
+        to find containers, or 'auto', and defaults to the one chosen in the
+        options.
+
+        Returns:
+            The checker
+
+        """
+        self.filename = filename
+        self.lines = lines
+        self.tree = tree
+        self.file_tokens = file_tokens
+        self.engine = self.default_engine if engine is None else engine
+        self.errors.clear()
+        del self.last_starts_at[:]
+        self.function_depth = 0
+        self.inside_conditional_block = 0
+        return self
 
     def _check_opening(
         self,
@@ -116,6 +1722,7 @@ class MultilineContainers:
         line_number: int,
         line: str,
         error_code: ErrorCodes,
+        scan: LineScan = None,
     ):
         """Implementation for JS101.
 
@@ -128,23 +1735,25 @@ class MultilineContainers:
             close_character: Closing character for the container.
             line_number: The number of the line. Reported back to flake8.
             line: The line to check.
-            error_code: The error to report if the validation fails.
+            error_code: The error to report if the validation fails, or
+                None to only keep track of containers.
+            scan: The result of scanning the line. Scanned here if not given.
 
         """
-        open_times, close_times = self._number_of_matches_in_line(
-            open_character, close_character, line,
-        )
+        if scan is None:
+            scan = scan_line(line)
+
+        open_times, close_times = scan.counts[open_character]
 
         # Tuples, functions, and classes all use lunula brackets.
         # Ensure only tuples are caught by JS101.
         if open_character == '(':
-            for _ in re.finditer(FUNCTION_CALL_REGEX, line):
-                # When inside a function with multiline arguments,
-                # ignore the opening bracket
-                self.function_depth += 1
+            # When inside a function with multiline arguments,
+            # ignore the opening bracket
+            self.function_depth += scan.function_calls
 
             # If detected a conditional block, ignore it
-            if CONDITIONAL_BLOCK_REGEX.search(line):
+            if scan.conditional_block:
                 self.inside_conditional_block += 1
 
             if open_times != close_times:
@@ -157,6 +1766,9 @@ class MultilineContainers:
                 [get_left_pad(line)] * open_times,
             )
 
+            if error_code is None:
+                return
+
             # Multiple opening characters
             if open_times > 1:
                 e = _error(line_number + 1, 0, error_code)
@@ -201,6 +1813,7 @@ class MultilineContainers:
         line_number: int,
         line: str,
         error_code: ErrorCodes,
+        scan: LineScan = None,
     ):
         """Implementation for JS102.
 
@@ -212,12 +1825,15 @@ class MultilineContainers:
             close_character: Closing character for the container.
             line_number: The number of the line. Reported back to flake8.
             line: The line to check.
-            error_code: The error to report if the validation fails.
+            error_code: The error to report if the validation fails, or
+                None to only keep track of containers.
+            scan: The result of scanning the line. Scanned here if not given.
 
         """
-        open_times, close_times = self._number_of_matches_in_line(
-            open_character, close_character, line,
-        )
+        if scan is None:
+            scan = scan_line(line)
+
+        open_times, close_times = scan.counts[open_character]
 
         if close_times > 0 and self.inside_conditional_block:
             close_times -= 1
@@ -232,6 +1848,10 @@ class MultilineContainers:
                 self.function_depth -= 1
 
         elif close_times > 0 and open_times == 0 and self.last_starts_at:
+            if error_code is None:
+                self.last_starts_at.pop()
+                return
+
             index = self._get_closing_index(line, close_character)
 
             if index != self.last_starts_at[-1]:
@@ -241,18 +1861,35 @@ class MultilineContainers:
             # Remove the last start location
             self.last_starts_at.pop()
 
-    def check_for_js101(self, line_number: int, line: str):
+    def check_for_js101(
+        self,
+        line_number: int,
+        line: str,
+        scan: LineScan = None,
+    ):
         """Validate JS101 for a single line.
 
         When a line opens a container
         And the container isn't closed on the same line
         Then the line should break after the opening brackets
         """
-        self._check_opening('{', '}', line_number, line, ErrorCodes.JS101)
-        self._check_opening('[', ']', line_number, line, ErrorCodes.JS101)
-        self._check_opening('(', ')', line_number, line, ErrorCodes.JS101)
+        if scan is None:
+            scan = scan_line(line)
+
+        # Containers are still tracked when JS101 isn't reported, since JS102
+        # relies on them.
+        code = ErrorCodes.JS101 if ErrorCodes.JS101 in _active_rules else None
+        for opening, closing in _brackets:
+            self._check_opening(
+                opening, closing, line_number, line, code, scan,
+            )
 
-    def check_for_js102(self, line_number: int, line: str):
+    def check_for_js102(
+        self,
+        line_number: int,
+        line: str,
+        scan: LineScan = None,
+    ):
         """Validate JS102 for a single line.
 
         When a line closes a container
@@ -260,67 +1897,798 @@ class MultilineContainers:
         Then the closing character must be on the same column as the
         opening line
         """
-        self._check_closing('{', '}', line_number, line, ErrorCodes.JS102)
-        self._check_closing('[', ']', line_number, line, ErrorCodes.JS102)
-        self._check_closing('(', ')', line_number, line, ErrorCodes.JS102)
+        if scan is None:
+            scan = scan_line(line)
 
-    def docstring_status(self, line: str, quote: str, last_status: int) -> int:
-        """Check if a line is part of a docstring.
+        code = ErrorCodes.JS102 if ErrorCodes.JS102 in _active_rules else None
+        for opening, closing in _brackets:
+            self._check_closing(
+                opening, closing, line_number, line, code, scan,
+            )
+
+    def run(self):
+        """Entry point for the plugin."""
+        if self.result_cache is None:
+            self.check()
+
+        else:
+            key = self.result_cache.key(
+                self.lines, self.version, self.engine, sys.version_info[:2],
+                _selection(),
+            )
+            errors = self.result_cache.get(key)
+            if errors is None:
+                self.check()
+                self.result_cache.set(key, self.errors)
+
+            else:
+                self.errors.extend(errors)
+
+        for e in self.errors:
+            yield e
+
+    def check(self):
+        """Check the file with the selected engine."""
+        if not _active_rules:
+            # Nothing that could be found would be reported.
+            return
+
+        if self.engine == 'auto':
+            engine = select_engine(self)
+
+        else:
+            engine = ENGINES[self.engine]
+
+        if not engine.all_rules and not _active_rules.keys() <= BUILT_IN_RULES:
+            # Only engines that find whole containers can check other rules.
+            engine = ENGINES['tokens']
+
+        engine.run(self)
+
+    def check_lines(self):
+        """Check every line for JS101 and JS102 without using tokens."""
+        # Quote of the triple quoted string the current line is inside of.
+        quote = None
+
+        # Most lines have no brackets or quotes, so nothing to check.
+        search = PREFILTER_REGEX.search
+        for index, line in enumerate(self.lines):
+            if search(line):
+                quote = self.check_line(index, line, quote)
+
+    def check_line(self, line_number: int, line: str, quote: str) -> str:
+        """Check a single line for JS101 and JS102.
 
         Arguments:
-            line: The line to scan
-            quote: The kind of quotation mark to check
-            last_status: The state of the previous line scanned
+            line_number: The number of the line. Reported back to flake8.
+            line: The line to check.
+            quote: The triple quote of a string the line starts inside of.
 
         Returns:
-            0 if outside a docstring
-            1 if inside
-            2 if exiting, next line should be outside
+            The triple quote of a string that continues onto the next line.
 
         """
-        new_status = last_status
-        if last_status == 2:
-            new_status = 0
+        scan, quote = line_cache(line, quote)
+        if scan is not EMPTY_SCAN:
+            self.check_for_js101(line_number, line, scan)
+            self.check_for_js102(line_number, line, scan)
 
-        strip = line.strip()
+        return quote
 
-        # If a line starts with a triple quotation mark, it's either:
-        if strip.startswith(quote):
-            # A single line docstring
-            if strip.endswith(quote) and len(strip) > 3:
-                new_status = 2
 
-            # Entering multiline docstring
-            elif last_status != 1:
-                new_status = 1
+class _LogicalLines:
+    """Tokens with a None after each logical line.
 
-            # Exiting docstring where closing is on separate line.
-            elif last_status == 1:
-                new_status = 2
+    The row the last logical line ended on and the indentation of each block
+    open after it are kept, which is all the tokenizer needs to carry on from
+    the next line.
 
-        # Exiting multiline docstring where closing is on same line as text.
-        elif strip.endswith(quote) and last_status == 1:
-            new_status = 2
+    Raises:
+        tokenize.TokenError: At a closing bracket that was never opened,
+            like the tokenizer does from Python 3.12.
+    """
 
-        return new_status
+    __slots__ = ('_tokens', 'indents', 'row')
 
-    def run(self):
-        """Entry point for the plugin."""
-        single_quote_status = 0
-        double_quote_status = 0
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self.indents = []
+        self.row = 0
 
-        for index, line in enumerate(self.lines):
-            # Ensure docstrings are ignored
-            single_quote_status = self.docstring_status(
-                line, "'''", single_quote_status,
+    def __iter__(self) -> iter:
+        depth = 0
+        for token in self._tokens:
+            if token.type == tokenize.OP:
+                depth += BRACKET_DEPTHS.get(token.string, 0)
+                if depth < 0:
+                    raise tokenize.TokenError(
+                        'unmatched closing bracket', token.start,
+                    )
+
+            elif token.type == tokenize.INDENT:
+                self.indents.append(token.string)
+            elif token.type == tokenize.DEDENT:
+                self.indents.pop()
+
+            yield token
+            if token.type == tokenize.NEWLINE:
+                self.row = token.start[0]
+                yield None
+
+
+class IncrementalChecker:
+    """Check a file with tokens, then recheck only what an edit changed.
+
+    The tokenizer's state is kept at the start of every logical line, which
+    is only where no container is open. After an edit, checking starts again
+    from the nearest of those before the edit and stops once the state after
+    the edit matches the previous check again. The errors are the ones the
+    tokens engine finds, up to where the file can no longer be tokenized.
+    """
+
+    def __init__(self, lines):
+        self.lines = list(lines)
+
+        # Indentation of each block open before the start of each logical
+        # line, by index.
+        self.checkpoints = {}
+
+        # Errors found on each line, by index.
+        self.errors_by_line = {}
+
+        # Number of lines checked by the last check.
+        self.lines_checked = 0
+
+        self._check_from(0, (), len(self.lines), 0, {}, {})
+
+    @property
+    def errors(self) -> list:
+        """Get every error in the file, in line order."""
+        return [
+            e for index in sorted(self.errors_by_line)
+            for e in self.errors_by_line[index]
+        ]
+
+    def update(self, start: int, stop: int, new_lines: list) -> list:
+        """Replace lines and check the file again.
+
+        Arguments:
+            start: Index of the first line replaced.
+            stop: Index after the last line replaced.
+            new_lines: The lines to put in their place.
+
+        Returns:
+            list of every error in the file
+
+        """
+        new_lines = list(new_lines)
+        self.lines[start:stop] = new_lines
+
+        begin = start
+        while begin not in self.checkpoints:
+            begin -= 1
+
+        self._check_from(
+            begin,
+            self.checkpoints[begin],
+            start + len(new_lines),
+            len(new_lines) - (stop - start),
+            self.checkpoints,
+            self.errors_by_line,
+        )
+
+        return self.errors
+
+    def _check_from(
+        self,
+        begin: int,
+        state: tuple,
+        resume: int,
+        delta: int,
+        old_checkpoints: dict,
+        old_errors: dict,
+    ):
+        """Check lines from a checkpoint until the old results are valid.
+
+        Arguments:
+            begin: Index of the line to start at.
+            state: The indentation of each block open before that line.
+            resume: Index of the first line after the edit.
+            delta: Number of lines the edit added.
+            old_checkpoints: Checkpoints from the previous check.
+            old_errors: Errors from the previous check.
+
+        """
+        self.checkpoints = {
+            i: s for i, s in old_checkpoints.items() if i < begin
+        }
+        # Kept even past the last line, so there's always one to start from.
+        self.checkpoints[begin] = state
+        self.errors_by_line = {
+            i: e for i, e in old_errors.items() if i < begin
+        }
+        self.lines_checked = len(self.lines) - begin
+
+        # A line indented like each open block, so the tokenizer expects the
+        # same indentation as it did when it got to the checkpoint.
+        lines = [indent + '0\n' for indent in state] + self.lines[begin:]
+        offset = begin - len(state)
+        logical = _LogicalLines(
+            tokenize.generate_tokens(iter(lines).__next__),
+        )
+
+        try:
+            for error in _token_errors(logical, lines):
+                if error is not None:
+                    index = error[0] - 1 + offset
+                    self.errors_by_line.setdefault(index, []).append(
+                        (index + 1, *error[1:]),
+                    )
+                    continue
+
+                index = logical.row + offset
+                if index <= begin:
+                    continue
+
+                state = tuple(logical.indents)
+                old_index = index - delta
+                if index >= resume and old_checkpoints.get(old_index) == state:
+                    self.lines_checked = index - begin
+                    self._keep_after(
+                        old_index, delta, old_checkpoints, old_errors,
+                    )
+                    return
+
+                self.checkpoints[index] = state
+
+        except (SyntaxError, tokenize.TokenError):
+            # Nothing after this can be checked until it's fixed.
+            pass
+
+    def _keep_after(
+        self,
+        old_index: int,
+        delta: int,
+        old_checkpoints: dict,
+        old_errors: dict,
+    ):
+        """Keep the previous results from a line onwards, moved by delta."""
+        for i, s in old_checkpoints.items():
+            if i >= old_index:
+                self.checkpoints[i + delta] = s
+
+        for i, errors in old_errors.items():
+            if i >= old_index:
+                self.errors_by_line[i + delta] = [
+                    (i + delta + 1, *e[1:]) for e in errors
+                ]
+
+
+class _StreamedLines:
+    """Lines read from an iterable, keeping only the last few.
+
+    Lines are tokenized as they're read, so a container is always opened on
+    one of the last lines read, which is all check_tokens looks up.
+    """
+
+    __slots__ = ('_lines', '_recent', '_count')
+
+    # Number of lines kept.
+    KEPT = 2
+
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._recent = {}
+        self._count = 0
+
+    def readline(self) -> str:
+        """Read the next line, or an empty string at the end."""
+        line = next(self._lines, '')
+        if line:
+            self._recent[self._count] = line
+            self._recent.pop(self._count - self.KEPT, None)
+            self._count += 1
+
+        return line
+
+    def __getitem__(self, index: int) -> str:
+        return self._recent[index]
+
+
+def check_stream(lines) -> iter:
+    """Check lines as they arrive, yielding each error once it's known.
+
+    Lines are tokenized as they're read, and containers are found as the
+    tokens engine finds them in a file, so the errors are the same. Only the
+    containers still open and the last lines read are kept, so memory grows
+    with nesting depth rather than with the length of the input.
+
+    Arguments:
+        lines: Any iterable of lines that keep their line endings, such as a
+            text file object or sys.stdin.
+
+    Raises:
+        tokenize.TokenError: If a string or container isn't closed.
+        SyntaxError: If the lines are indented inconsistently.
+
+    Yields:
+        (line number, column, message) for each error
+
+    """
+    streamed = _StreamedLines(lines)
+    tokens = tokenize.generate_tokens(streamed.readline)
+    for line_number, column, message, _ in _token_errors(tokens, streamed):
+        yield line_number, column, message
+
+
+# Files of at least this many bytes are checked from a memory map by
+# check_file in flake8_multiline_containers_standalone, without decoding them
+# into lines.
+LARGE_FILE_SIZE = 8 * 1024 * 1024
+
+# Matches the bytes that matter to containers, from outside of any string.
+# Strings and comments are matched whole so they can be skipped. A quote
+# that doesn't start a complete string is matched on its own.
+MAPPED_TOKEN_REGEX = _LazyPattern(
+    rb"(?P<string>[rRbBuUfF]{0,2}(?:"
+    rb"'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'\'\'"
+    rb'|"\"\"[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"\"\"'
+    rb"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+    rb'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    rb"))"
+    rb"|(?P<comment>#[^\r\n]*)"
+    rb"|(?P<quote>['\"])"
+    rb"|[][(){},]",
+    re.DOTALL,
+)
+
+# Matches the name or number that ends some code.
+MAPPED_WORD_REGEX = _LazyPattern(rb'[\w\x80-\xff]+\Z')
+
+# Bytes that never start a token.
+MAPPED_WHITESPACE = b' \t\f\r\n\\'
+
+
+def _is_logical_newline(space: bytes) -> bool:
+    """Check if whitespace between tokens ends a line outside of brackets."""
+    return b'\n' in space.replace(b'\\\r\n', b'').replace(b'\\\n', b'')
+
+
+def _mapped_column(buffer, offset: int) -> int:
+    """Get the column of a byte in characters, decoding only its line."""
+    line_start = buffer.rfind(b'\n', 0, offset) + 1
+    # Leaves out the byte order mark at the start of the file, if any.
+    return len(buffer[line_start:offset].decode('utf-8-sig'))
+
+
+def check_mapped(path: str) -> list:
+    """Check a file's bytes with the tokens engine's rules, from an mmap.
+
+    Only strings, comments, brackets and commas are matched, straight from
+    the memory map, so the file is never decoded into lines. A line is only
+    decoded to find the column of an error on it. Files that aren't UTF-8
+    are decoded and checked with check_tokens instead.
+
+    Raises:
+        tokenize.TokenError: If a string or container isn't closed.
+
+    Returns:
+        list of errors
+
+    """
+    import mmap
+
+    with open(path, 'rb') as f:
+        encoding, _ = tokenize.detect_encoding(f.readline)
+        if encoding not in ('utf-8', 'utf-8-sig'):
+            f.seek(0)
+            lines = io.TextIOWrapper(f, encoding).readlines()
+            tokens = tokenize.generate_tokens(iter(lines).__next__)
+            return check_tokens(tokens, lines)
+
+        if not os.fstat(f.fileno()).st_size:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _check_buffer(buffer, 3 if encoding == 'utf-8-sig' else 0)
+
+
+def _mapped_follows_callable(previous: bytes) -> bool:
+    """Check if the last code or token before a lunula bracket is callable.
+
+    Arguments:
+        previous: The last token, or the code between tokens, before it.
+
+    """
+    if previous in (b')', b']'):
+        return True
+
+    word = MAPPED_WORD_REGEX.search(previous)
+    if word is None or word.group()[:1].isdigit():
+        return False
+
+    return not keyword.iskeyword(word.group().decode('utf-8'))
+
+
+def _advance(text: bytes, offset: int, row: int, line_start: int) -> tuple:
+    """Move the row and line start past some text found at an offset."""
+    newlines = text.count(b'\n')
+    if newlines:
+        return row + newlines, offset + text.rfind(b'\n') + 1
+
+    return row, line_start
+
+
+def _skip_gap(
+    gap: bytes,
+    offset: int,
+    stack: list,
+    previous: bytes,
+    row: int,
+    line_start: int,
+) -> tuple:
+    """Move past the code between two matched tokens.
+
+    Returns:
+        The last code in the gap, or a newline if the gap ends a line outside
+        of brackets, otherwise the previous token. Then the row and line
+        start after the gap.
+
+    """
+    code = gap.rstrip(MAPPED_WHITESPACE)
+    if code:
+        previous = code
+        if stack and stack[-1].content_row is None:
+            code_start = len(gap) - len(gap.lstrip(MAPPED_WHITESPACE))
+            stack[-1].content_row = row + gap.count(b'\n', 0, code_start)
+
+    if not stack and _is_logical_newline(gap[len(code):]):
+        previous = b'\n'
+
+    return (previous, *_advance(gap, offset, row, line_start))
+
+
+def _check_buffer(buffer, start: int) -> list:
+    """Check JS101 and JS102 in the bytes of a UTF-8 encoded file."""
+    errors = []
+    stack = []
+    row = 1
+    line_start = position = start
+
+    # The last token, or the code between tokens, outside of comments.
+    previous = b'\n'
+
+    for match in MAPPED_TOKEN_REGEX.finditer(buffer, start):
+        token_start = match.start()
+        if position != token_start:
+            previous, row, line_start = _skip_gap(
+                buffer[position:token_start], position, stack, previous,
+                row, line_start,
             )
-            double_quote_status = self.docstring_status(
-                line, '"""', double_quote_status,
+
+        position = match.end()
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+
+        if stack and stack[-1].content_row is None:
+            stack[-1].content_row = row
+
+        text = match.group()
+        if kind == 'string':
+            row, line_start = _advance(text, token_start, row, line_start)
+
+        elif kind == 'quote':
+            raise tokenize.TokenError('EOF in multi-line string', (row, 0))
+
+        elif text == b',':
+            if stack:
+                stack[-1].awaiting_comma = False
+
+        else:
+            _check_mapped_bracket(
+                text, buffer, token_start, row, line_start, stack, errors,
+                previous,
             )
 
-            if single_quote_status == 0 and double_quote_status == 0:
-                self.check_for_js101(index, line)
-                self.check_for_js102(index, line)
+        previous = text
 
-        for e in self.errors:
-            yield e
+    if stack:
+        raise tokenize.TokenError('EOF in multi-line statement', (row, 0))
+
+    return errors
+
+
+def _check_mapped_bracket(
+    character: bytes,
+    buffer,
+    offset: int,
+    row: int,
+    line_start: int,
+    stack: list,
+    errors: list,
+    previous: bytes,
+):
+    """Open or close a container for a bracket found at a byte offset.
+
+    Arguments:
+        previous: The last token, or the code between tokens, before it.
+
+    """
+    if character in b'([{':
+        line = buffer[line_start:offset]
+        lunula = character == b'('
+        ignored = character not in _mapped_openings or (
+            lunula and _mapped_follows_callable(previous)
+        )
+        stack.append(OpenContainer(
+            row=row,
+            column=offset,
+            pad=len(line) - len(line.lstrip(b' ')),
+            opening=character.decode(),
+            ignored=ignored,
+            awaiting_comma=lunula and not ignored,
+        ))
+
+    elif stack:
+        _check_closed_mapped(
+            stack.pop(), buffer, row, offset, line_start, errors,
+        )
+
+
+def _check_closed_mapped(
+    container: OpenContainer,
+    buffer,
+    row: int,
+    offset: int,
+    line_start: int,
+    errors: list,
+):
+    """Check a container closed at a byte offset with every rule."""
+    if container.ignored or container.awaiting_comma or row == container.row:
+        return
+
+    # The padding is only spaces, so it's the same in bytes and characters.
+    _apply_rules(Container(
+        opening=container.opening,
+        row=container.row,
+        column=_mapped_column(buffer, container.column),
+        pad=container.pad,
+        content_after_opening=container.content_row == container.row,
+        close_row=row,
+        close_column=_mapped_column(buffer, offset),
+    ), errors)
+
+
+# Splits source into strings, comments, and the code between them. A quote
+# that doesn't start a complete string is split off on its own.
+SOURCE_PARTS_REGEX = _LazyPattern(
+    rb"[^'\"#]+"
+    rb"|'\'\'[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'\'\'"
+    rb'|"\"\"[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"\"\"'
+    rb"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+    rb'|"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+    rb"|#[^\r\n]*"
+    rb"|['\"]",
+    re.DOTALL,
+)
+
+
+def _numpy_masks(np, source: bytes, data) -> tuple:
+    """Find which bytes of the source are in strings, and in comments.
+
+    Raises:
+        tokenize.TokenError: If a string isn't closed.
+
+    Returns:
+        Boolean arrays for strings and for comments, one item per byte
+
+    """
+    parts = SOURCE_PARTS_REGEX.findall(source)
+    lengths = np.fromiter(map(len, parts), dtype=np.int64, count=len(parts))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    first = data[starts]
+
+    quoted = (first == ord("'")) | (first == ord('"'))
+    if np.any(quoted & (lengths == 1)):
+        raise tokenize.TokenError('EOF in multi-line string', (0, 0))
+
+    masks = []
+    for kind in (quoted, first == ord('#')):
+        inside = np.bincount(starts[kind], minlength=len(source) + 1)
+        inside -= np.bincount(ends[kind], minlength=len(source) + 1)
+        masks.append(np.cumsum(inside[:-1]) > 0)
+
+    return tuple(masks)
+
+
+def check_numpy(source: bytes) -> list:
+    """Check JS101 and JS102 with the tokens engine's rules, using NumPy.
+
+    Brackets outside of strings and comments are paired from the running
+    total of their depth, and everything else needed is looked up for all
+    of them at once. Only containers spread over several lines are looked
+    at one by one, to tell calls from tuples and to check them with every
+    rule.
+
+    Arguments:
+        source: The file, encoded as UTF-8.
+
+    Raises:
+        ImportError: If NumPy isn't installed.
+        tokenize.TokenError: If a string or container isn't closed.
+
+    Returns:
+        list of errors
+
+    """
+    import numpy as np
+
+    data = np.frombuffer(source, dtype=np.uint8)
+    strings, comments = _numpy_masks(np, source, data)
+    code = ~(strings | comments)
+
+    opening = np.zeros(256, dtype=bool)
+    opening[list(b'([{')] = True
+    closing = np.zeros(256, dtype=bool)
+    closing[list(b')]}')] = True
+    whitespace = np.zeros(256, dtype=bool)
+    whitespace[list(MAPPED_WHITESPACE)] = True
+
+    brackets = np.flatnonzero((opening[data] | closing[data]) & code)
+    opens = opening[data[brackets]]
+    depth = np.cumsum(np.where(opens, 1, -1))
+    if len(depth) and (depth.min() < 0 or depth[-1] != 0):
+        raise tokenize.TokenError('EOF in multi-line statement', (0, 0))
+
+    # Each opening and its closing are next to each other once sorted by the
+    # depth inside them.
+    level = np.where(opens, depth, depth + 1)
+    order = np.argsort(level, kind='stable')
+    starts = brackets[order][0::2]
+    ends = brackets[order][1::2]
+    levels = level[order][0::2]
+
+    # A comma directly inside a container is at the same depth as it.
+    commas = np.flatnonzero((data == ord(',')) & code)
+    comma_levels = np.concatenate(([0], depth))[
+        np.searchsorted(brackets, commas)
+    ]
+    width = len(source) + 1
+    owners = np.searchsorted(
+        levels.astype(np.int64) * width + starts,
+        comma_levels.astype(np.int64) * width + commas,
+        'right',
+    ) - 1
+    has_comma = np.zeros(len(starts), dtype=bool)
+    has_comma[owners[comma_levels > 0]] = True
+
+    newlines = np.flatnonzero(data == ord('\n'))
+    start_rows = np.searchsorted(newlines, starts) + 1
+    end_rows = np.searchsorted(newlines, ends) + 1
+
+    # Containers on a single line, grouping lunula brackets, and containers
+    # that aren't checked are fine.
+    lunula = data[starts] == ord('(')
+    checked = np.zeros(256, dtype=bool)
+    checked[[opening[0] for opening in _mapped_openings]] = True
+    multiline = (start_rows != end_rows) & (has_comma | ~lunula)
+    keep = np.flatnonzero(multiline & checked[data[starts]])
+    keep = keep[np.argsort(ends[keep])]
+    starts, ends, levels, lunula = (
+        starts[keep], ends[keep], levels[keep], lunula[keep],
+    )
+    start_rows, end_rows = start_rows[keep], end_rows[keep]
+
+    # Everything tokenize makes a token of, outside of comments.
+    significant = np.flatnonzero(
+        ~whitespace[data] & ~comments & ~(code & (data == ord('\\'))),
+    )
+    content = significant[np.searchsorted(significant, starts, 'right')]
+    content_after = np.searchsorted(newlines, content) + 1 == start_rows
+
+    line_starts = np.concatenate(([0], newlines + 1))
+    start_lines = line_starts[start_rows - 1]
+    not_spaces = np.flatnonzero(data != ord(' '))
+    pads = not_spaces[np.searchsorted(not_spaces, start_lines)] - start_lines
+
+    # Columns in characters leave out UTF-8 continuation bytes, and the byte
+    # order mark.
+    continuations = np.concatenate(
+        ([0], np.cumsum((data & 0xC0) == 0x80)),
+    )
+    start_columns = _numpy_columns(
+        source, continuations, starts, start_lines,
+    )
+    end_columns = _numpy_columns(
+        source, continuations, ends, line_starts[end_rows - 1],
+    )
+
+    # JS101 and JS102 can only report these, so when they're the only rules
+    # the rest aren't looked at.
+    suspects = np.zeros(len(starts), dtype=bool)
+    if ErrorCodes.JS101 in _active_rules:
+        suspects |= content_after
+    if ErrorCodes.JS102 in _active_rules:
+        suspects |= end_columns != pads
+    if not _active_rules.keys() <= BUILT_IN_RULES:
+        suspects[:] = True
+
+    before = np.searchsorted(significant, starts) - 1
+
+    errors = []
+    for i in np.flatnonzero(suspects).tolist():
+        start = int(starts[i])
+        if lunula[i] and before[i] >= 0 and _numpy_callable(
+            source, strings, int(significant[before[i]]), start,
+            int(levels[i]),
+        ):
+            continue
+
+        _apply_rules(Container(
+            opening=chr(source[start]),
+            row=int(start_rows[i]),
+            column=int(start_columns[i]),
+            pad=int(pads[i]),
+            content_after_opening=bool(content_after[i]),
+            close_row=int(end_rows[i]),
+            close_column=int(end_columns[i]),
+        ), errors)
+
+    return errors
+
+
+def _numpy_columns(source: bytes, continuations, offsets, line_starts):
+    """Get the columns of bytes in characters, all at once.
+
+    Arguments:
+        source: The file, encoded as UTF-8.
+        continuations: Running total of continuation bytes before each byte.
+        offsets: Offsets of the bytes.
+        line_starts: Offsets of the starts of their lines.
+
+    """
+    columns = offsets - line_starts
+    columns -= continuations[offsets] - continuations[line_starts]
+    if source.startswith(codecs.BOM_UTF8):
+        columns[line_starts == 0] -= 1
+
+    return columns
+
+
+def _numpy_callable(
+    source: bytes,
+    strings,
+    previous: int,
+    offset: int,
+    level: int,
+) -> bool:
+    """Check if a lunula bracket belongs to a call, from the byte before it.
+
+    Arguments:
+        source: The file, encoded as UTF-8.
+        strings: Which bytes are inside strings.
+        previous: Offset of the last byte of the token before the bracket.
+        offset: Offset of the bracket.
+        level: Depth inside the bracket.
+
+    """
+    # Outside of brackets a new line is a new statement.
+    if level == 1 and _is_logical_newline(source[previous + 1:offset]):
+        return False
+
+    if strings[previous]:
+        return False
+
+    if source[previous] in b')]':
+        return True
+
+    start = source.rfind(b'\n', 0, previous) + 1
+    return _mapped_follows_callable(source[start:previous + 1])
+
+
+if __name__ == '__main__':
+    from flake8_multiline_containers_standalone import main
+
+    sys.exit(main())
@@ -0,0 +1,1289 @@
+"""Check files without flake8: in batches, from asyncio, or in a daemon.
+
+Also holds the command line checker and its watch mode. flake8 never
+imports this module, so none of it adds to the time flake8 takes to load
+the plugin.
+"""
+import ast
+import errno
+import functools
+import io
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+import tokenize
+
+import attr
+
+# Checks the profiler times are looked up through the module when they're
+# called, since profiling replaces them there.
+import flake8_multiline_containers
+from flake8_multiline_containers import (
+    _LazyPattern,
+    _StreamedLines,
+    _token_errors,
+    check_stream,
+    enable_profiling,
+    ENGINES,
+    LARGE_FILE_SIZE,
+    MultilineContainers,
+    RESULT_CACHE_MAX_ENTRIES,
+)
+
+
+# Checkers reused by check_file, since a process checks many files. Each
+# thread has its own, so sources can be checked in a thread pool.
+_file_checkers = threading.local()
+
+
+def check_file(
+    path: str,
+    engine: str = 'auto',
+    changed_lines: list = None,
+    large_file_size: int = LARGE_FILE_SIZE,
+) -> list:
+    """Check a single file outside of flake8.
+
+    Files that can't be parsed or tokenized are scanned line by line.
+
+    Arguments:
+        path: The file to check.
+        engine: Name of the engine to use, or 'auto'.
+        changed_lines: Sorted line numbers. If given, only containers that
+            touch one of them are reported.
+        large_file_size: Files of at least this many bytes are checked from
+            a memory map when the engine is 'auto'.
+
+    Returns:
+        list of errors
+
+    """
+    whole_file = engine == 'auto' and changed_lines is None
+    if whole_file and os.path.getsize(path) >= large_file_size:
+        try:
+            return flake8_multiline_containers.check_mapped(path)
+        except tokenize.TokenError:
+            pass
+
+    with tokenize.open(path) as f:
+        lines = f.readlines()
+
+    if changed_lines is not None:
+        return _check_changed_lines(path, lines, engine, changed_lines)
+
+    return _check_lines(path, lines, engine)
+
+
+def _check_lines(filename: str, lines: list, engine: str) -> list:
+    """Check lines with this thread's checker.
+
+    Lines that can't be parsed or tokenized are scanned line by line.
+    """
+    checker = getattr(_file_checkers, 'checker', None)
+    if checker is None:
+        checker = _file_checkers.checker = MultilineContainers()
+
+    checker.reset(filename=filename, lines=lines, engine=engine)
+    try:
+        return list(checker.run())
+    except (SyntaxError, tokenize.TokenError):
+        checker.reset(filename=filename, lines=lines, engine='lines')
+        return list(checker.run())
+
+
+@attr.s(frozen=True, slots=True)
+class CheckResult:
+    """The errors found in one source checked by check_many."""
+
+    name = attr.ib()
+    errors = attr.ib()
+
+    # Time spent checking the source, not waiting for a worker.
+    seconds = attr.ib()
+
+
+def _check_batch(sources: list, engine: str) -> list:
+    """Check (name, source) pairs one after another in this process."""
+    results = []
+    for name, source in sources:
+        start = time.perf_counter()
+        lines = io.StringIO(source).readlines()
+        errors = _check_lines(name, lines, engine)
+        results.append(CheckResult(name, errors, time.perf_counter() - start))
+
+    return results
+
+
+def check_many(
+    sources,
+    engine: str = 'auto',
+    executor=None,
+    chunk_size: int = 64,
+) -> list:
+    """Check many sources, such as snippets or changed files, in one call.
+
+    Each process checks with a single checker reset between sources, so the
+    line cache and compiled patterns stay warm from one source to the next.
+    Sources that can't be parsed or tokenized are scanned line by line.
+
+    Arguments:
+        sources: (name, source) pairs. The source is the text to check.
+        engine: Name of the engine to use, or 'auto'.
+        executor: A concurrent.futures executor to check chunks of sources
+            in, such as a ProcessPoolExecutor kept between calls. Sources are
+            checked in this process if not given.
+        chunk_size: Number of sources sent to the executor at once.
+
+    Returns:
+        list of CheckResult, in the same order as the sources
+
+    """
+    if executor is None:
+        return _check_batch(sources, engine)
+
+    sources = list(sources)
+    chunks = [
+        sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)
+    ]
+    futures = [executor.submit(_check_batch, c, engine) for c in chunks]
+    return [result for f in futures for result in f.result()]
+
+
+# Lines AsyncChecker checks on the event loop before letting other tasks run.
+ASYNC_CHUNK_LINES = 1000
+
+
+def _check_chunk(checker, lines: list, start: int, quote: str) -> str:
+    """Check a chunk of a stream by line, starting at line number start.
+
+    Returns:
+        The triple quote of a string that continues onto the next chunk.
+
+    """
+    # Looked up each time, since set_selection replaces it.
+    search = flake8_multiline_containers.PREFILTER_REGEX.search
+    for index, line in enumerate(lines, start):
+        if search(line):
+            quote = checker.check_line(index, line, quote)
+
+    return quote
+
+
+def _paced(tokens, lines: int) -> iter:
+    """Put a None between the tokens every so many lines."""
+    pause_after = lines
+    for token in tokens:
+        if token.start[0] > pause_after:
+            pause_after = token.start[0] + lines - 1
+            yield None
+
+        yield token
+
+
+async def _chunks(lines, size: int):
+    """Split an iterable, or an asynchronous iterable, of lines into lists."""
+    if not hasattr(lines, '__aiter__'):
+        lines = iter(lines)
+        chunk = list(itertools.islice(lines, size))
+        while chunk:
+            yield chunk
+            chunk = list(itertools.islice(lines, size))
+
+        return
+
+    chunk = []
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+class _Unlimited:
+    """Stands in for a semaphore when any number of checks may run at once."""
+
+    async def __aenter__(self):
+        pass
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+@attr.s(slots=True)
+class AsyncChecker:
+    """Check sources from asyncio code without blocking the event loop.
+
+    Without an executor, sources are checked on the loop a chunk of lines at
+    a time, and other tasks run between chunks. The lines engine scans each
+    chunk line by line. Any other engine finds containers from the tokens,
+    as check_stream does, which gives the errors those engines find. With an
+    executor, each source is checked there while the loop carries on.
+
+    Checks are cancelled like any other coroutine. On the loop, a check
+    stops before its next chunk. A check already running in an executor
+    finishes there, but its result is dropped.
+
+    Attributes:
+        engine: Name of the engine to use, or 'auto'.
+        executor: A concurrent.futures executor to check sources in, or None
+            to check them on the loop.
+        limit: Most sources checked at once, or None for no limit. Other
+            checks wait for their turn.
+        chunk_lines: Lines checked on the loop before other tasks may run.
+
+    """
+
+    engine = attr.ib(default='auto')
+    executor = attr.ib(default=None)
+    limit = attr.ib(default=None)
+    chunk_lines = attr.ib(default=ASYNC_CHUNK_LINES)
+
+    # Made on first use, so it belongs to the loop checks run on.
+    _semaphore = attr.ib(default=None, init=False, repr=False)
+
+    def _slot(self):
+        """Return what's held while checking one source."""
+        if self._semaphore is None:
+            import asyncio
+
+            if self.limit is None:
+                self._semaphore = _Unlimited()
+            else:
+                self._semaphore = asyncio.Semaphore(self.limit)
+
+        return self._semaphore
+
+    async def check(self, source: str, name: str = 'stdin') -> CheckResult:
+        """Check a whole source.
+
+        Sources that can't be tokenized are scanned line by line, as in an
+        executor.
+
+        Returns:
+            CheckResult for the source. Its time doesn't include waiting for
+            other tasks or for a worker.
+
+        """
+        async with self._slot():
+            if self.executor is not None:
+                return await self._check_in_executor(source, name)
+
+            lines = io.StringIO(source).readlines()
+            try:
+                return await self._check_whole(lines, name, self.engine)
+            except (SyntaxError, tokenize.TokenError):
+                return await self._check_whole(lines, name, 'lines')
+
+    async def check_stream(self, lines):
+        """Check lines as they arrive, yielding errors for each chunk.
+
+        Arguments:
+            lines: Any iterable, or asynchronous iterable, of lines that keep
+                their line endings. With an executor, or an asynchronous
+                iterable and any engine but lines, every line is read before
+                checking.
+
+        Raises:
+            tokenize.TokenError: If a string or container isn't closed, when
+                checking from the tokens on the loop.
+
+        Yields:
+            (line number, column, message) for each error
+
+        """
+        async with self._slot():
+            if self.executor is None:
+                async for errors, _ in self._check_on_loop(lines, self.engine):
+                    for line_number, column, message, _ in errors:
+                        yield line_number, column, message
+
+                return
+
+            source = []
+            async for chunk in _chunks(lines, self.chunk_lines):
+                source.extend(chunk)
+
+            result = await self._check_in_executor(''.join(source), 'stdin')
+            for line_number, column, message, _ in result.errors:
+                yield line_number, column, message
+
+    async def _check_in_executor(self, source: str, name: str) -> CheckResult:
+        """Check a whole source in the executor."""
+        import asyncio
+
+        results = await asyncio.get_event_loop().run_in_executor(
+            self.executor, _check_batch, [(name, source)], self.engine,
+        )
+        return results[0]
+
+    async def _check_whole(
+        self,
+        lines: list,
+        name: str,
+        engine: str,
+    ) -> CheckResult:
+        """Check every line of a source on the loop."""
+        errors = []
+        seconds = 0.0
+        async for chunk_errors, chunk_seconds in self._check_on_loop(
+            lines, engine,
+        ):
+            errors.extend(chunk_errors)
+            seconds += chunk_seconds
+
+        return CheckResult(name, errors, seconds)
+
+    async def _check_on_loop(self, lines, engine: str):
+        """Check lines on the loop, yielding the errors found in each chunk.
+
+        Yields:
+            (errors, seconds spent checking the chunk)
+
+        """
+        import asyncio
+
+        if engine == 'lines':
+            checks = self._scan_chunks(lines)
+
+        else:
+            if hasattr(lines, '__aiter__'):
+                # The tokenizer can't wait for lines, so they're read first.
+                lines = [
+                    line
+                    async for chunk in _chunks(lines, self.chunk_lines)
+                    for line in chunk
+                ]
+
+            checks = self._token_chunks(lines)
+
+        async for errors, seconds in checks:
+            yield errors, seconds
+
+            # Let other tasks run, and any cancellation arrive.
+            await asyncio.sleep(0)
+
+    async def _scan_chunks(self, lines):
+        """Scan a chunk of lines at a time, as the lines engine does."""
+        checker = MultilineContainers()
+        quote = None
+        start = 0
+        async for chunk in _chunks(lines, self.chunk_lines):
+            began = time.perf_counter()
+            quote = _check_chunk(checker, chunk, start, quote)
+            errors = list(checker.errors)
+            checker.errors.clear()
+            start += len(chunk)
+            yield errors, time.perf_counter() - began
+
+    async def _token_chunks(self, lines):
+        """Check the tokens of a chunk of lines at a time."""
+        streamed = _StreamedLines(lines)
+        tokens = tokenize.generate_tokens(streamed.readline)
+
+        errors = []
+        began = time.perf_counter()
+        for error in _token_errors(_paced(tokens, self.chunk_lines), streamed):
+            if error is not None:
+                errors.append(error)
+                continue
+
+            yield errors, time.perf_counter() - began
+            errors = []
+            began = time.perf_counter()
+
+        yield errors, time.perf_counter() - began
+
+
+def _check_changed_lines(
+    path: str,
+    lines: list,
+    engine: str,
+    changed_lines: list,
+) -> list:
+    """Check only the containers that touch the changed lines of a file.
+
+    The AST engine skips every part of the tree away from the changes. The
+    token engine still reads every token, but skips containers away from
+    them. Scanning line by line can't tell where containers start and end,
+    so only errors on the changed lines are kept.
+    """
+    if engine in ('auto', 'tree') and ENGINES['tree'].available:
+        try:
+            tree = ast.parse(''.join(lines))
+        except SyntaxError:
+            engine = 'lines'
+        else:
+            return flake8_multiline_containers.check_tree(
+                tree, lines, changed_lines,
+            )
+
+    if engine != 'lines':
+        tokens = tokenize.generate_tokens(iter(lines).__next__)
+        try:
+            return flake8_multiline_containers.check_tokens(
+                tokens, lines, changed_lines,
+            )
+        except (SyntaxError, tokenize.TokenError):
+            pass
+
+    changed = set(changed_lines)
+    return [e for e in check_file(path, engine) if e[0] in changed]
+
+
+# Matches the header of a hunk in a unified diff.
+HUNK_REGEX = _LazyPattern(r'@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+def _hunk_changes(header, body) -> set:
+    """Get the lines in the new file changed by one hunk.
+
+    Arguments:
+        header: The hunk header, matched by HUNK_REGEX.
+        body: Iterator over the rest of the diff. The hunk's lines are taken
+            from it.
+
+    """
+    old_count, start, new_count = header.groups()
+    old_left = int(old_count or 1)
+    new_left = int(new_count or 1)
+
+    # When only lines were removed, the start is the line before them.
+    new_line = int(start) + (new_left == 0)
+
+    changed = set()
+    while old_left > 0 or new_left > 0:
+        line = next(body, None)
+        if line is None:
+            break
+
+        if line.startswith('+'):
+            changed.add(new_line)
+            new_line += 1
+            new_left -= 1
+
+        elif line.startswith('-'):
+            changed.add(new_line)
+            old_left -= 1
+
+        elif not line.startswith('\\'):
+            new_line += 1
+            old_left -= 1
+            new_left -= 1
+
+    return changed
+
+
+def parse_diff(diff: str) -> dict:
+    """Find the lines changed in each file of a unified diff.
+
+    A removed line counts as a change to the line that now follows it.
+
+    Returns:
+        dict of file path to sorted line numbers in the new file
+
+    """
+    changed = {}
+    current = None
+    lines = iter(diff.splitlines())
+
+    for line in lines:
+        if line.startswith('+++ '):
+            path = line[4:].split('\t')[0]
+            if path == '/dev/null':
+                current = None
+
+            else:
+                if path.startswith('b/'):
+                    path = path[2:]
+                current = changed.setdefault(path, set())
+
+        elif current is not None:
+            match = HUNK_REGEX.match(line)
+            if match:
+                current.update(_hunk_changes(match, lines))
+
+    return {path: sorted(lines) for path, lines in changed.items()}
+
+
+def find_files(paths: list) -> list:
+    """Get every Python file in the given files and directories."""
+    found = []
+    for path in paths:
+        if not os.path.isdir(path):
+            found.append(path)
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            found.extend(
+                os.path.join(root, name)
+                for name in sorted(files) if name.endswith('.py')
+            )
+
+    return found
+
+
+def _git(*args) -> str:
+    """Run git, and get what it printed."""
+    import subprocess
+
+    return subprocess.run(
+        ['git', *args],
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+
+
+def _read_diff(revisions: str) -> dict:
+    """Find the lines changed in each file, in a diff from stdin or from git.
+
+    git gives paths from the top of the repository, so they're made relative
+    to the current directory, which can be anywhere in it.
+
+    Returns:
+        dict of file path to sorted line numbers in the new file
+
+    """
+    if revisions == '-':
+        return parse_diff(sys.stdin.read())
+
+    root = _git('rev-parse', '--show-toplevel').rstrip('\n')
+    changed = parse_diff(
+        _git('diff', '--unified=0', '--no-color', revisions, '--'),
+    )
+    return {
+        os.path.relpath(os.path.join(root, path)): lines
+        for path, lines in changed.items()
+    }
+
+
+def _print_stream(lines, name: str) -> int:
+    """Print the errors in streamed lines as soon as each is found.
+
+    Lines that can't be tokenized are reported as E902, as flake8 does.
+
+    Returns:
+        1 if any errors were found, otherwise 0
+
+    """
+    found = 0
+    try:
+        for line_number, column, message in check_stream(lines):
+            print(f'{name}:{line_number}:{column + 1}: {message}', flush=True)
+            found = 1
+
+    except (SyntaxError, tokenize.TokenError) as e:
+        print(f'{name}:0:1: E902 {type(e).__name__}: {e}', flush=True)
+        found = 1
+
+    return found
+
+
+# Environment variable with the Unix socket a daemon started with --serve
+# listens on. The standalone checker asks it to check files if it's set.
+SOCKET_VARIABLE = 'MULTILINE_CONTAINERS_SOCKET'
+
+
+@functools.lru_cache(maxsize=RESULT_CACHE_MAX_ENTRIES)
+def _check_file_cached(
+    path: str,
+    modified: int,
+    size: int,
+    engine: str,
+    changed_lines: tuple,
+    large_file_size: int,
+) -> list:
+    """Check a file, reusing the errors found while it was unchanged."""
+    if changed_lines is not None:
+        changed_lines = list(changed_lines)
+
+    return check_file(path, engine, changed_lines, large_file_size)
+
+
+def _answer(request: dict) -> dict:
+    """Answer a daemon client's request to check a file or a source."""
+    if request.get('version') != MultilineContainers.version:
+        return {'error': f'daemon is version {MultilineContainers.version}'}
+
+    engine = request.get('engine', 'auto')
+    try:
+        if 'path' in request:
+            path = request['path']
+            stat = os.stat(path)
+            changed = request.get('changed_lines')
+            errors = _check_file_cached(
+                path,
+                stat.st_mtime_ns,
+                stat.st_size,
+                engine,
+                None if changed is None else tuple(changed),
+                request.get('large_file_size', LARGE_FILE_SIZE),
+            )
+
+        else:
+            errors = _check_lines(
+                request.get('name', 'stdin'),
+                io.StringIO(request['source']).readlines(),
+                engine,
+            )
+
+    except (OSError, SyntaxError, ValueError, KeyError) as e:
+        return {'error': repr(e)}
+
+    return {'errors': errors}
+
+
+def make_server(socket_path: str):
+    """Make a server that checks files for clients on a Unix socket.
+
+    Requests are answered one at a time, by one warm checker. Results for
+    files that haven't changed since they were last checked are reused.
+
+    Returns:
+        socketserver.UnixStreamServer, not yet serving
+
+    Raises:
+        FileExistsError: If something other than a socket is at the path.
+        OSError: If a daemon is already listening on the socket.
+
+    """
+    import socketserver
+    import stat
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            # One JSON request per line, each answered on a line.
+            for line in self.rfile:
+                response = _answer(json.loads(line))
+                self.wfile.write(json.dumps(response).encode() + b'\n')
+                self.wfile.flush()
+
+    if os.path.exists(socket_path):
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise FileExistsError(errno.EEXIST, 'Not a socket', socket_path)
+
+        if request_checks(socket_path, []) is None:
+            # Left behind by a daemon that didn't stop cleanly.
+            os.unlink(socket_path)
+
+    return socketserver.UnixStreamServer(socket_path, Handler)
+
+
+def serve(socket_path: str) -> int:
+    """Check files for clients on a Unix socket until stopped."""
+    import signal
+
+    try:
+        server = make_server(socket_path)
+    except OSError as e:
+        print(f"Can't serve on {socket_path}: {e}", file=sys.stderr)
+        return 1
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+
+    return 0
+
+
+def request_checks(socket_path: str, requests: list) -> list:
+    """Ask a daemon started with --serve to check files or sources.
+
+    Arguments:
+        socket_path: The Unix socket the daemon listens on.
+        requests: Dicts, each with either a 'path' to check, or a 'source'
+            and its 'name'. They may also give the 'engine' to use, and for
+            a path, its 'changed_lines' and the 'large_file_size'.
+
+    Returns:
+        list of the errors found for each request, or None if no daemon is
+        listening or it couldn't check all of them
+
+    """
+    import socket
+
+    version = MultilineContainers.version
+    results = []
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(socket_path)
+            with client.makefile('rwb') as stream:
+                for request in requests:
+                    request = dict(request, version=version)
+                    stream.write(json.dumps(request).encode() + b'\n')
+                    stream.flush()
+
+                    response = json.loads(stream.readline() or '{}')
+                    if 'errors' not in response:
+                        return None
+
+                    results.append([tuple(e) for e in response['errors']])
+
+    except (AttributeError, OSError, ValueError):
+        # No daemon, or no Unix sockets on this platform.
+        return None
+
+    return results
+
+
+def _check_stdin(socket_path: str, engine: str) -> int:
+    """Check a file read from stdin, with a daemon if one is listening.
+
+    With the auto engine, lines are checked as they're read, and the errors
+    are the same as for a file. Any other engine reads the whole file first.
+
+    Returns:
+        1 if any errors were found, otherwise 0
+
+    """
+    if socket_path is None and engine == 'auto':
+        return _print_stream(sys.stdin, 'stdin')
+
+    source = sys.stdin.read()
+    results = None
+    if socket_path is not None:
+        request = {'source': source, 'engine': engine}
+        results = request_checks(socket_path, [request])
+
+    if results is None:
+        lines = io.StringIO(source).readlines()
+        if engine == 'auto':
+            return _print_stream(lines, 'stdin')
+
+        results = [_check_lines('stdin', lines, engine)]
+
+    for line_number, column, message, _ in sorted(results[0]):
+        print(f'stdin:{line_number}:{column + 1}: {message}')
+
+    return int(bool(results[0]))
+
+
+def _file_size(path: str) -> int:
+    """Get the size of a file, or 0 if it can't be found."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _check_job(
+    path: str,
+    engine: str,
+    changed_lines: list,
+    large_file_size: int,
+) -> list:
+    """Check a file, reporting it as E902 if it can't be read, as flake8 does.
+
+    Files that don't exist, or that have an unknown encoding in their coding
+    cookie, don't stop the other files from being checked.
+    """
+    try:
+        return check_file(path, engine, changed_lines, large_file_size)
+    except (OSError, SyntaxError, ValueError) as e:
+        return [(0, 0, f'E902 {type(e).__name__}: {e}', None)]
+
+
+def _check_jobs(jobs: list, processes: int, profiling, socket_path) -> dict:
+    """Check files, with a daemon if one is listening, or in a pool.
+
+    Returns:
+        dict of the errors found in each file
+
+    """
+    if socket_path is not None:
+        results = request_checks(socket_path, [
+            {
+                'path': os.path.abspath(path),
+                'engine': engine,
+                'changed_lines': changed,
+                'large_file_size': large_file_size,
+            }
+            for path, engine, changed, large_file_size in jobs
+        ])
+        if results is not None:
+            return {job[0]: errors for job, errors in zip(jobs, results)}
+
+    if processes <= 1 or len(jobs) <= 1:
+        return {job[0]: _check_job(*job) for job in jobs}
+
+    import concurrent.futures
+
+    with concurrent.futures.ProcessPoolExecutor(
+        processes,
+        initializer=profiling,
+    ) as executor:
+        futures = {job[0]: executor.submit(_check_job, *job) for job in jobs}
+        return {path: f.result() for path, f in futures.items()}
+
+
+# Seconds to wait for more changes after one is seen, so a burst of saves is
+# checked once.
+WATCH_DEBOUNCE = 0.1
+
+# Seconds between scans of the watched files when polling.
+WATCH_POLL_INTERVAL = 0.5
+
+
+def _stat(path: str) -> tuple:
+    """Get what shows a file changed, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+@attr.s
+class PollingWatcher:
+    """Find changed Python files by scanning their mtime and size.
+
+    Attributes:
+        paths: Files or directories to watch.
+        interval: Seconds between scans.
+
+    """
+
+    paths = attr.ib()
+    interval = attr.ib(default=WATCH_POLL_INTERVAL)
+
+    # Mtime and size of each watched file, when last seen.
+    stats = attr.ib(init=False)
+
+    def __attrs_post_init__(self):
+        self.stats = self._scan()
+
+    def _scan(self) -> dict:
+        stats = {}
+        for path in find_files(self.paths):
+            stat = _stat(path)
+            if stat is not None:
+                stats[path] = stat
+
+        return stats
+
+    def _update(self, stats: dict) -> set:
+        """Record new stats, returning the files they show changed."""
+        changed = set()
+        for path, stat in stats.items():
+            if self.stats.get(path) != stat:
+                changed.add(path)
+                if stat is None:
+                    self.stats.pop(path, None)
+                else:
+                    self.stats[path] = stat
+
+        return changed
+
+    def _changes(self, timeout: float) -> set:
+        if timeout is None or timeout > self.interval:
+            timeout = self.interval
+
+        time.sleep(timeout)
+        stats = self._scan()
+        stats.update((p, None) for p in self.stats if p not in stats)
+        return self._update(stats)
+
+    def wait(self, timeout: float = None) -> set:
+        """Wait for files to change, for at most timeout seconds.
+
+        Returns:
+            set of the files that were changed, created or deleted
+
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+
+            changed = self._changes(remaining)
+            if changed or remaining == 0:
+                return changed
+
+    def close(self):
+        """Stop watching."""
+
+
+# Events that may change a watched file or directory. See inotify(7).
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_DELETE
+INOTIFY_MASK |= IN_MOVED_FROM | IN_MOVED_TO
+
+
+@attr.s
+class InotifyWatcher(PollingWatcher):
+    """Find changed Python files with inotify, only looking at those changed.
+
+    Raises:
+        OSError: inotify isn't available.
+
+    """
+
+    _fd = attr.ib(default=None, init=False)
+
+    # Directory watched by each watch descriptor.
+    _directories = attr.ib(factory=dict, init=False)
+
+    def __attrs_post_init__(self):
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+
+        self._add_watch = libc.inotify_add_watch
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        for path in self.paths:
+            if os.path.isdir(path):
+                self._watch_tree(path)
+            else:
+                self._watch(os.path.dirname(path) or '.')
+
+        super().__attrs_post_init__()
+
+    def _watch(self, directory: str):
+        wd = self._add_watch(
+            self._fd, os.fsencode(directory or '.'), INOTIFY_MASK,
+        )
+        if wd >= 0:
+            self._directories[wd] = directory
+
+    def _watch_tree(self, root: str):
+        for directory, dirs, _ in os.walk(root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            self._watch(directory)
+
+    def _wanted(self, path: str) -> bool:
+        """Whether a path is a file find_files would find."""
+        if path in self.stats or path in self.paths:
+            return True
+
+        return path.endswith('.py') and any(
+            path.startswith(os.path.join(root, ''))
+            for root in self.paths if os.path.isdir(root)
+        )
+
+    def _directory_changed(self, path: str, mask: int) -> set:
+        """Watch a directory that was added, or forget one that went.
+
+        Returns:
+            set of the files that may have come or gone with it
+
+        """
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            if os.path.basename(path).startswith('.'):
+                return set()
+
+            # Files may have been added before the watch was.
+            self._watch_tree(path)
+            return set(find_files([path]))
+
+        inside = os.path.join(path, '')
+        return {p for p in self.stats if p.startswith(inside)}
+
+    def _changes(self, timeout: float) -> set:
+        import select
+        import struct
+
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return set()
+
+        data = os.read(self._fd, 65536)
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            # struct inotify_event, followed by the name.
+            wd, mask, _, size = struct.unpack_from('iIII', data, offset)
+            name = data[offset + 16:offset + 16 + size].rstrip(b'\0')
+            offset += 16 + size
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost, so check everything.
+                return super()._changes(0)
+
+            directory = self._directories.get(wd, '')
+            path = os.path.join(directory, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                paths.update(self._directory_changed(path, mask))
+            else:
+                paths.add(path)
+
+        return self._update({p: _stat(p) for p in paths if self._wanted(p)})
+
+    def close(self):
+        """Stop watching."""
+        os.close(self._fd)
+
+
+def make_watcher(paths: list, poll: bool = False) -> PollingWatcher:
+    """Watch files with inotify where it's available, otherwise by polling."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(paths)
+        except OSError:
+            pass
+
+    return PollingWatcher(paths)
+
+
+def _print_errors(results: dict, paths):
+    """Print the errors found in some of the files, in flake8's format."""
+    for path in sorted(paths):
+        for line_number, column, message, _ in sorted(results[path]):
+            print(f'{path}:{line_number}:{column + 1}: {message}', flush=True)
+
+
+def _recheck(results: dict, changed: set, engine: str, large_file_size: int):
+    """Check the files that changed in this process, printing their errors.
+
+    Files that went are forgotten. Files that can't be read are reported as
+    E902, as when they're first checked.
+    """
+    for path in changed:
+        results.pop(path, None)
+        if os.path.isfile(path):
+            results[path] = _check_job(path, engine, None, large_file_size)
+
+    _print_errors(results, changed.intersection(results))
+
+
+def _print_summary(results: dict, checked: int, seconds: float):
+    failing = sum(1 for errors in results.values() if errors)
+    errors = sum(len(errors) for errors in results.values())
+    print(
+        f'{errors} errors in {failing} of {len(results)} files, '
+        f'{checked} checked in {seconds * 1000:.1f}ms',
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def watch(
+    paths: list,
+    engine: str = 'auto',
+    large_file_size: int = LARGE_FILE_SIZE,
+    processes: int = 1,
+    socket_path: str = None,
+    poll: bool = False,
+    debounce: float = WATCH_DEBOUNCE,
+) -> int:
+    """Check files, then recheck those that change, until interrupted.
+
+    The first check is shared out like a normal run. After that, changed
+    files are checked in this process, where the checker is warm, once no
+    more have changed for debounce seconds. The errors in each changed file
+    are printed, and a summary of the errors in every file is printed to
+    stderr.
+
+    Returns:
+        1 if any errors were found when interrupted, otherwise 0
+
+    """
+    watcher = make_watcher(paths, poll)
+    results = {}
+    try:
+        start = time.perf_counter()
+        jobs = [
+            (path, engine, None, large_file_size)
+            for path, _ in sorted(
+                watcher.stats.items(),
+                key=lambda item: item[1][1],
+                reverse=True,
+            )
+        ]
+        results = _check_jobs(jobs, processes, None, socket_path)
+        _print_errors(results, results)
+        _print_summary(results, len(results), time.perf_counter() - start)
+
+        while True:
+            changed = watcher.wait()
+            more = watcher.wait(debounce)
+            while more:
+                changed |= more
+                more = watcher.wait(debounce)
+
+            start = time.perf_counter()
+            _recheck(results, changed, engine, large_file_size)
+            _print_summary(results, len(changed), time.perf_counter() - start)
+
+    except KeyboardInterrupt:
+        return int(any(results.values()))
+
+    finally:
+        watcher.close()
+
+
+def main(argv: list = None) -> int:
+    """Check files for JS101 and JS102 without starting flake8.
+
+    Files are checked in a pool of processes, largest first so one big file
+    doesn't start last and hold up the end of the run. If a daemon started
+    with --serve is listening on the socket given, it checks them instead.
+    Errors are printed in flake8's default format.
+
+    Returns:
+        1 if any errors were found, otherwise 0
+
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m flake8_multiline_containers',
+        description='Check multiline containers for JS101 and JS102.',
+    )
+    parser.add_argument(
+        'paths',
+        nargs='*',
+        help='Files or directories. - reads a file from stdin.',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Number of processes to check files with. (Default: CPU count)',
+    )
+    parser.add_argument(
+        '--engine',
+        default='auto',
+        choices=['auto', *(n for n, e in ENGINES.items() if e.available)],
+        help='How containers are found. (Default: auto)',
+    )
+    parser.add_argument(
+        '--large-file-size',
+        type=int,
+        default=LARGE_FILE_SIZE,
+        metavar='BYTES',
+        help='Check files of at least this size from a memory map, without '
+             'decoding them, when the engine is auto. '
+             f'(Default: {LARGE_FILE_SIZE})',
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print the time spent in each phase of checking at exit.',
+    )
+    parser.add_argument(
+        '--profile-slowest',
+        type=int,
+        default=0,
+        metavar='N',
+        help='Profile, and list the N files that took longest to check.',
+    )
+    parser.add_argument(
+        '--profile-slow-line',
+        type=float,
+        default=None,
+        metavar='MS',
+        help='Profile, and list lines that took at least MS milliseconds to '
+             'scan. Only the lines engine scans line by line.',
+    )
+    parser.add_argument(
+        '--diff',
+        nargs='?',
+        const='-',
+        metavar='REVISIONS',
+        help='Only check containers touching lines changed in a unified diff '
+             'read from stdin, or from git diff for the given revisions.',
+    )
+    parser.add_argument(
+        '--serve',
+        metavar='SOCKET',
+        help='Stay running, checking files for clients on a Unix socket.',
+    )
+    parser.add_argument(
+        '--socket',
+        default=os.environ.get(SOCKET_VARIABLE),
+        help='Unix socket of a daemon started with --serve to check files '
+             'with. Files are checked here if none is listening. '
+             f'(Default: ${SOCKET_VARIABLE})',
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running, rechecking files as they change.',
+    )
+    parser.add_argument(
+        '--watch-poll',
+        action='store_true',
+        help='Watch for changes by polling, even where inotify is available.',
+    )
+    args = parser.parse_args(argv)
+
+    profiling = None
+    slow_line = args.profile_slow_line
+    if args.profile or args.profile_slowest or slow_line is not None:
+        if slow_line is not None:
+            slow_line /= 1000
+
+        profiling = functools.partial(
+            enable_profiling,
+            slowest=args.profile_slowest,
+            slow_line=slow_line,
+        )
+        profiling()
+
+    if args.serve:
+        return serve(args.serve)
+
+    if args.paths == ['-'] and args.diff is None:
+        return _check_stdin(args.socket, args.engine)
+
+    changed = {}
+    if args.diff is None:
+        if not args.paths:
+            parser.error('at least one path is required without --diff')
+
+        if args.watch:
+            return watch(
+                args.paths,
+                args.engine,
+                args.large_file_size,
+                args.jobs,
+                args.socket,
+                args.watch_poll,
+            )
+
+        paths = find_files(args.paths)
+
+    else:
+        changed = _read_diff(args.diff)
+        paths = [p for p in changed if p.endswith('.py') and os.path.isfile(p)]
+        if args.paths:
+            wanted = {os.path.normpath(p) for p in find_files(args.paths)}
+            paths = [p for p in paths if os.path.normpath(p) in wanted]
+
+    paths.sort(key=_file_size, reverse=True)
+    jobs = [
+        (path, args.engine, changed.get(path), args.large_file_size)
+        for path in paths
+    ]
+
+    results = _check_jobs(jobs, args.jobs, profiling, args.socket)
+    _print_errors(results, results)
+    return int(any(results.values()))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,17 +12,23 @@ def read(filename):
 setuptools.setup(
     name="flake8-multiline-containers",
     license="MIT",
-    version="0.0.11",
+    version="1.0.0",
     description="Ensure a consistent format for multiline containers.",
     long_description=read('README.rst'),
     author="Joshua Fehler",
     author_email="jsfehler@gmail.com",
     url="https://github.com/jsfehler/flake8-multiline-containers",
-    py_modules=["flake8_multiline_containers"],
+    py_modules=[
+        "flake8_multiline_containers",
+        "flake8_multiline_containers_standalone",
+    ],
     install_requires=[
-        "flake8 >= 3.7.9",
+        "flake8 >= 3.8.0",
         "attrs >= 19.3.0",
     ],
+    extras_require={
+        "numpy": ["numpy"],
+    },
     entry_points={
         'flake8.extension': [
             'JS = flake8_multiline_containers:MultilineContainers',
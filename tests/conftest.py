@@ -1,8 +1,14 @@
-from flake8_multiline_containers import MultilineContainers
+from flake8_multiline_containers import MultilineContainers, set_selection
 
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def select_everything():
+    # Running flake8 selects codes for the rest of the process.
+    set_selection()
+
+
 @pytest.fixture
 def linter():
     m = MultilineContainers()
@@ -0,0 +1,30 @@
+from os.path import (join,
+                     split)
+
+x = (a,
+     b), c
+
+x = (a), (b,
+          c)
+
+y = d[a,
+      b]
+
+y = d[
+    a]
+
+y = (d)[a:
+        b]
+
+z = (k
+     for k, v in y)
+
+z = f(k
+      for k, v in y)
+
+z = f((k
+       for k, v in y))
+
+w = {'é': (1,
+           2), 'ü': [3,
+   4]}
@@ -0,0 +1,10 @@
+container_in_f_string = f"""{ {
+'a': 1,
+    'b': 2} }"""
+
+call_and_list_in_f_string = f"""abc {foo(1,
+ 2)} {[1,
+2]}"""
+
+container_with_f_string_and_error = [1,
+  f'{1}']
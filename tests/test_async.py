@@ -0,0 +1,151 @@
+import asyncio
+import concurrent.futures
+
+from flake8_multiline_containers import check_stream
+from flake8_multiline_containers_standalone import AsyncChecker, check_many
+
+import pytest
+
+SOURCE = 'foo = {"a": 1,\n  }\nbar = [\n    1]\n'
+
+# Many lines, so checking on the loop takes many chunks.
+BIG_SOURCE = SOURCE * 500
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+async def _lines(source):
+    for line in source.splitlines(True):
+        yield line
+
+
+async def _collect(stream):
+    return [error async for error in stream]
+
+
+def test_check():
+    result = _run(AsyncChecker(chunk_lines=3).check(BIG_SOURCE, 'big.py'))
+
+    expected, = check_many([('big.py', BIG_SOURCE)])
+    assert 'big.py' == result.name
+    assert sorted(expected.errors) == sorted(result.errors)
+
+
+def test_check_stream():
+    checker = AsyncChecker(chunk_lines=3)
+    errors = _run(_collect(checker.check_stream(_lines(BIG_SOURCE))))
+
+    assert list(check_stream(BIG_SOURCE.splitlines(True))) == errors
+
+
+def test_check_in_executor():
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        checker = AsyncChecker(executor=executor)
+        result = _run(checker.check(SOURCE))
+        errors = _run(_collect(checker.check_stream(_lines(SOURCE))))
+
+    expected, = check_many([('stdin', SOURCE)])
+    assert expected.errors == result.errors
+    assert [e[:3] for e in result.errors] == errors
+
+
+@pytest.mark.parametrize('engine', ['auto', 'lines', 'tokens'])
+def test_check_matches_executor(engine):
+    source = (
+        'def f():\n'
+        '    return (1,\n'
+        '            2)\n'
+        'x = foo(a, (1,\n'
+        '    2))\n'
+    ) * 10
+    checker = AsyncChecker(engine=engine, chunk_lines=3)
+    result = _run(checker.check(source))
+    errors = _run(_collect(checker.check_stream(_lines(source))))
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        checker = AsyncChecker(engine=engine, executor=executor)
+        result_in_executor = _run(checker.check(source))
+
+    # Engines find errors in their own order.
+    assert sorted(result_in_executor.errors) == sorted(result.errors)
+    assert [e[:3] for e in result.errors] == errors
+
+
+def test_check_lets_other_tasks_run():
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(len(ticks))
+            await asyncio.sleep(0)
+
+    async def check():
+        ticker = asyncio.ensure_future(tick())
+        await AsyncChecker(chunk_lines=10).check(BIG_SOURCE)
+        ticker.cancel()
+
+    _run(check())
+
+    assert len(ticks) > 100
+
+
+def test_limit():
+    checker = AsyncChecker(limit=1)
+
+    async def check():
+        first = checker.check_stream(SOURCE.splitlines(True))
+        await first.__anext__()
+
+        # The first check still holds the only slot.
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(checker.check(SOURCE), 0.1)
+
+        await first.aclose()
+        return await asyncio.wait_for(checker.check(SOURCE), 1)
+
+    assert 3 == len(_run(check()).errors)
+
+
+def test_cancel():
+    async def check():
+        task = asyncio.ensure_future(
+            AsyncChecker(chunk_lines=1).check(BIG_SOURCE),
+        )
+        await asyncio.sleep(0)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        _run(check())
+
+
+def test_check_in_threads():
+    sources = [SOURCE * i for i in range(1, 100)]
+
+    async def check(checker):
+        return await asyncio.gather(*map(checker.check, sources))
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = _run(check(AsyncChecker(executor=executor)))
+
+    expected = check_many(('stdin', source) for source in sources)
+    assert [r.errors for r in expected] == [r.errors for r in results]
+
+
+def test_check_line_numbers():
+    # Only newlines end lines, as when a file is read.
+    source = 'foo = "\f\x1c\x85 "\nbar = {"a": 1,\n  }\n'
+    result = _run(AsyncChecker().check(source))
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        checker = AsyncChecker(executor=executor)
+        result_in_executor = _run(checker.check(source))
+
+    assert [2, 3] == [e[0] for e in result.errors]
+    assert [2, 3] == [e[0] for e in result_in_executor.errors]
@@ -0,0 +1,44 @@
+import concurrent.futures
+
+from flake8_multiline_containers_standalone import check_many
+
+SOURCES = [
+    ('fine.py', 'foo = {\n    "a": 1,\n}\n'),
+    ('broken.py', 'foo = {"a": 1,\n  }\n'),
+    ('syntax_error.py', 'foo = [1,\n]\nif\n'),
+]
+
+
+def test_check_many():
+    results = check_many(SOURCES)
+
+    assert [name for name, _ in SOURCES] == [r.name for r in results]
+    assert [0, 2, 1] == [len(r.errors) for r in results]
+    assert all(r.seconds >= 0 for r in results)
+
+
+def test_check_many_executor():
+    with concurrent.futures.ProcessPoolExecutor(2) as executor:
+        results = check_many(SOURCES * 3, executor=executor, chunk_size=2)
+
+    expected = check_many(SOURCES * 3)
+    assert [r.errors for r in expected] == [r.errors for r in results]
+
+
+def test_check_many_threads():
+    sources = [
+        (f'{i}.py', 'foo = {"a": 1,\n  }\n' * i) for i in range(1, 200)
+    ]
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = check_many(sources, executor=executor, chunk_size=1)
+
+    expected = check_many(sources)
+    assert [r.errors for r in expected] == [r.errors for r in results]
+
+
+def test_check_many_line_numbers():
+    # Only newlines end lines, as when a file is read.
+    source = 'foo = "\f\x1c\x85 "\nbar = {"a": 1,\n  }\n'
+    result, = check_many([('separators.py', source)])
+
+    assert [(2, 6), (3, 2)] == [e[:2] for e in result.errors]
@@ -0,0 +1,42 @@
+import io
+import tokenize
+
+from flake8_multiline_containers import check_tokens
+
+
+def _check(source):
+    lines = io.StringIO(source).readlines()
+    tokens = list(tokenize.generate_tokens(iter(lines).__next__))
+    return [e[:2] for e in check_tokens(tokens, lines)]
+
+
+def test_check_tokens_no_error():
+    assert [] == _check("foo = {\n    'a': 1,\n}\n")
+
+
+def test_check_tokens_js101():
+    assert [(1, 6)] == _check("foo = {'a': 1,\n}\n")
+
+
+def test_check_tokens_js102():
+    assert [(2, 10)] == _check("foo = {\n    'a': 1}\n")
+
+
+def test_check_tokens_comment_after_opening():
+    assert [] == _check("foo = {  # comment\n    'a': 1,\n}\n")
+
+
+def test_check_tokens_multiline_string():
+    assert [] == _check("foo = '''{\n'''\n")
+
+
+def test_check_tokens_function_call_ignored():
+    assert [] == _check("foo = bizbat('hello',\n       'world')\n")
+
+
+def test_check_tokens_tuple_after_keyword():
+    assert [(1, 7), (2, 9)] == _check("return (1,\n        2)\n")
+
+
+def test_check_tokens_wrapped_expression_ignored():
+    assert [] == _check("if (a\n    or b):\n    pass\n")
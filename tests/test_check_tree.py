@@ -0,0 +1,79 @@
+import ast
+import sys
+
+from flake8_multiline_containers import check_tree
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(ast.expr, 'end_lineno'),
+    reason='AST end positions require Python 3.8',
+)
+
+
+def _check(source):
+    lines = source.splitlines(keepends=True)
+    return [e[:2] for e in check_tree(ast.parse(source), lines)]
+
+
+def test_check_tree_no_error():
+    assert [] == _check("foo = {\n    'a': 1,\n}\n")
+
+
+def test_check_tree_js101():
+    assert [(1, 6)] == _check("foo = {'a': 1,\n}\n")
+
+
+def test_check_tree_js102():
+    assert [(2, 10)] == _check("foo = {\n    'a': 1}\n")
+
+
+def test_check_tree_comment_after_opening():
+    assert [] == _check("foo = {  # comment\n    'a': 1,\n}\n")
+
+
+def test_check_tree_tuple_without_brackets():
+    assert [] == _check("foo = 1, \\\n    2\n")
+
+
+def test_check_tree_tuple_starts_with_brackets():
+    assert [(1, 4), (2, 6)] == _check("x = (a,\n     b), c\n")
+
+
+def test_check_tree_tuple_starts_with_wrapped_element():
+    assert [(1, 9), (2, 11)] == _check("x = (a), (b,\n          c)\n")
+
+
+def test_check_tree_subscript():
+    assert [(1, 5), (2, 7)] == _check("y = d[a,\n      b]\n")
+
+
+def test_check_tree_import():
+    source = "from x import (a,\n               b)\n"
+    assert [(1, 14), (2, 16)] == _check(source)
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 9),
+    reason='Brackets around with items require Python 3.9',
+)
+def test_check_tree_with_items():
+    source = "with (a as b,\n      c as d):\n    pass\n"
+    assert [(1, 5), (2, 12)] == _check(source)
+
+
+def test_check_tree_generator():
+    assert [(1, 4), (2, 18)] == _check("x = (k\n     for k, v in y)\n")
+
+
+def test_check_tree_generator_in_call():
+    assert [] == _check("x = f(k\n      for k, v in y)\n")
+
+
+def test_check_tree_non_ascii():
+    assert [(1, 9)] == _check("é = 'é', {'a': 1,\n}\n")
+
+
+def test_check_tree_function_call_ignored():
+    assert [] == _check("foo = bizbat('hello',\n       'world')\n")
@@ -1,4 +1,4 @@
-from flake8_multiline_containers import ErrorCodes
+from flake8_multiline_containers import ErrorCodes, MESSAGES
 
 
 def test_check_opening_contains_error(linter):
@@ -9,3 +9,22 @@ def test_check_opening_contains_error(linter):
 def test_check_opening_no_error(linter):
     linter._check_opening('{', '}', 0, "foo={\n", ErrorCodes.JS101)
     assert 0 == len(linter.errors)
+
+
+def test_error_messages_are_shared(linter):
+    linter._check_opening('{', '}', 0, "foo={a\n", ErrorCodes.JS101)
+    linter._check_opening('{', '}', 1, "bar={b\n", ErrorCodes.JS101)
+
+    first, second = (e[2] for e in linter.errors)
+    assert first is second is MESSAGES[ErrorCodes.JS101]
+
+
+def test_reset_reuses_checker(linter):
+    list(linter.reset(lines=['foo = {a,\n'], engine='lines').run())
+    assert 1 == len(linter.last_starts_at)
+
+    linter.reset(lines=['foo = {\n', '}\n'], engine='lines')
+    errors = list(linter.run())
+
+    assert [] == errors
+    assert 0 == len(linter.last_starts_at)
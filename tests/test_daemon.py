@@ -0,0 +1,113 @@
+import io
+import threading
+
+from flake8_multiline_containers_standalone import (
+    check_file,
+    main,
+    make_server,
+    request_checks,
+)
+
+import pytest
+
+SOURCE = 'foo = {"a": 1,\n  }\n'
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    path = str(tmp_path / 'daemon.sock')
+    server = make_server(path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    yield path
+
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_request_checks(socket_path, dummy_file_path):
+    path = f'{dummy_file_path}/list/list.py'
+    results = request_checks(socket_path, [
+        {'path': path},
+        {'source': SOURCE, 'name': 'buffer.py', 'engine': 'lines'},
+        {'path': path},
+    ])
+
+    assert check_file(path) == results[0] == results[2]
+    assert [(1, 13), (2, 2)] == sorted(e[:2] for e in results[1])
+
+
+def test_request_checks_error(socket_path, tmp_path):
+    missing = {'path': str(tmp_path / 'missing.py')}
+
+    assert request_checks(socket_path, [missing]) is None
+
+
+def test_request_checks_no_daemon(tmp_path):
+    assert request_checks(str(tmp_path / 'none.sock'), []) is None
+
+
+@pytest.mark.parametrize('daemon', [True, False])
+def test_main_socket(capsys, request, tmp_path, dummy_file_path, daemon):
+    socket_path = str(tmp_path / 'none.sock')
+    if daemon:
+        socket_path = request.getfixturevalue('socket_path')
+
+    code = main([f'{dummy_file_path}/list', '--socket', socket_path])
+
+    out = capsys.readouterr().out.splitlines()
+    assert 1 == code
+    assert 11 == len(out)
+    assert out[0].startswith(f'{dummy_file_path}/list/list.py:19:')
+
+
+@pytest.mark.parametrize('daemon', [True, False])
+def test_main_socket_stdin(
+    capsys,
+    monkeypatch,
+    request,
+    tmp_path,
+    daemon,
+):
+    socket_path = str(tmp_path / 'none.sock')
+    if daemon:
+        socket_path = request.getfixturevalue('socket_path')
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(SOURCE))
+    code = main(['-', '--socket', socket_path])
+
+    out = capsys.readouterr().out.splitlines()
+    assert 1 == code
+    assert ['stdin:1:7:', 'stdin:2:3:'] == [o.split(' ')[0] for o in out]
+
+
+def test_make_server_in_use(socket_path):
+    with pytest.raises(OSError):
+        make_server(socket_path)
+
+
+def test_make_server_not_a_socket(tmp_path):
+    path = tmp_path / 'daemon.sock'
+    path.write_text('important')
+
+    with pytest.raises(FileExistsError):
+        make_server(str(path))
+
+    assert 'important' == path.read_text()
+
+
+def test_serve_in_use(capsys, socket_path):
+    assert 1 == main(['--serve', socket_path])
+    assert capsys.readouterr().err.startswith(f"Can't serve on {socket_path}")
+
+    # The daemon still has its socket.
+    assert [] == request_checks(socket_path, [])
+
+
+def test_request_checks_line_numbers(socket_path):
+    source = 'foo = "\f\x1c\x85 "\nbar = {"a": 1,\n  }\n'
+    results = request_checks(socket_path, [{'source': source}])
+
+    assert [2, 3] == [e[0] for e in results[0]]
@@ -0,0 +1,96 @@
+import io
+import subprocess
+
+from flake8_multiline_containers_standalone import check_file, main, parse_diff
+
+import pytest
+
+
+DIFF = """\
+diff --git a/foo.py b/foo.py
+--- a/foo.py
++++ b/foo.py
+@@ -1,3 +1,4 @@
+ a = 1
+-b = 2
++b = {1,
++}
+ c = 3
+@@ -10 +11,0 @@
+-d = 4
+--- a/gone.py
++++ /dev/null
+@@ -1 +0,0 @@
+-e = 5
+"""
+
+
+def test_parse_diff():
+    assert {'foo.py': [2, 3, 12]} == parse_diff(DIFF)
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'source.py'
+    path.write_text(
+        'foo = {1,\n'
+        '}\n'
+        '\n'
+        'bar = [\n'
+        '    {2,\n'
+        '     3},\n'
+        ']\n',
+    )
+    return str(path)
+
+
+@pytest.mark.parametrize('engine', ['auto', 'tokens'])
+@pytest.mark.parametrize('changed_lines, expected', [
+    ([], []),
+    ([1], [1]),
+    ([3], []),
+    ([5], [5, 6]),
+])
+def test_check_file_changed_lines(
+    source_file, engine, changed_lines, expected,
+):
+    errors = check_file(source_file, engine, changed_lines)
+
+    assert expected == sorted(e[0] for e in errors)
+
+
+def test_main_diff_from_stdin(capsys, monkeypatch, source_file):
+    diff = f'+++ b/{source_file}\n@@ -1,0 +5,1 @@\n+    {{2,\n'
+    monkeypatch.setattr('sys.stdin', io.StringIO(diff))
+
+    code = main(['--diff'])
+
+    out = capsys.readouterr().out.splitlines()
+    assert 1 == code
+    assert 2 == len(out)
+    assert out[0].startswith(f'{source_file}:5:')
+
+
+def test_main_diff_from_git_in_subdirectory(capsys, monkeypatch, tmp_path):
+    def git(*args):
+        subprocess.run(
+            ['git', '-c', 'user.name=a', '-c', 'user.email=a@a', *args],
+            cwd=str(tmp_path),
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    (tmp_path / 'sub').mkdir()
+    path = tmp_path / 'sub' / 'source.py'
+    path.write_text('foo = 1\n')
+    git('init')
+    git('add', '.')
+    git('commit', '-m', 'Add source')
+    path.write_text('foo = {1,\n}\n')
+    monkeypatch.chdir(str(tmp_path / 'sub'))
+
+    code = main(['--diff', 'HEAD'])
+
+    out = capsys.readouterr().out.splitlines()
+    assert 1 == code
+    assert ['source.py:1:7:'] == [o.split()[0] for o in out]
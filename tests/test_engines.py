@@ -0,0 +1,141 @@
+import os
+
+from flake8.main import cli
+
+from flake8_multiline_containers import (
+    check_mapped,
+    ENGINES,
+    MultilineContainers,
+    select_engine,
+)
+
+import pytest
+
+
+available_engines = [name for name, e in ENGINES.items() if e.available]
+
+# The lines engine only approximates which brackets are containers, so the
+# others are compared error for error with the tokens engine.
+exact_engines = [name for name in available_engines if name != 'lines']
+
+DUMMY_FILES = [
+    'callable/function_call.py',
+    'comments.py',
+    'conditional_block.py',
+    'dict/dict.py',
+    'dict/nested_dict.py',
+    'docstrings.py',
+    'engines.py',
+    'list/list.py',
+    'multiple_opening.py',
+    'set/set.py',
+    'string/f_strings.py',
+    'string/string_brackets.py',
+    'tuple/nested_tuple.py',
+    'tuple/tuple.py',
+]
+
+
+def _check_with(engine, path):
+    with open(path, encoding='utf-8') as f:
+        lines = f.readlines()
+
+    return sorted(MultilineContainers(lines=lines, engine=engine).run())
+
+
+@pytest.mark.parametrize('engine', available_engines)
+@pytest.mark.parametrize('path, expected', [
+    ('dict/dict.py', 8),
+    ('dict/nested_dict.py', 4),
+    ('callable/function_call.py', 0),
+    ('conditional_block.py', 0),
+    ('docstrings.py', 6),
+    ('string/f_strings.py', 2),
+])
+def test_engines_give_same_results(
+    capsys,
+    monkeypatch,
+    dummy_file_path,
+    engine,
+    path,
+    expected,
+):
+    # The engine given in the options is kept for the rest of the process.
+    monkeypatch.setattr(MultilineContainers, 'default_engine', 'auto')
+    lines_checked = ENGINES[engine].lines_checked
+
+    p = os.path.abspath(f'{dummy_file_path}/{path}')
+    try:
+        cli.main([
+            '--select', 'JS101,JS102',
+            '--multiline-containers-engine', engine,
+            p,
+        ])
+    except SystemExit:
+        # Older versions of flake8 exit once they're done.
+        pass
+
+    assert expected == len(capsys.readouterr().out.splitlines())
+    assert ENGINES[engine].lines_checked > lines_checked
+
+
+@pytest.mark.parametrize('engine', exact_engines)
+@pytest.mark.parametrize('path', DUMMY_FILES)
+def test_engines_find_same_errors(dummy_file_path, engine, path):
+    p = f'{dummy_file_path}/{path}'
+
+    assert _check_with('tokens', p) == _check_with(engine, p)
+
+
+@pytest.mark.parametrize('path', DUMMY_FILES)
+def test_mapped_finds_same_errors(dummy_file_path, path):
+    p = f'{dummy_file_path}/{path}'
+
+    assert _check_with('tokens', p) == sorted(check_mapped(p))
+
+
+def test_select_engine_dense_file():
+    pytest.importorskip('numpy')
+    lines = ["    {'a': [1, 2], 'b': (3, 4)},\n"] * 10
+    checker = MultilineContainers(lines=['foo = [\n', *lines, ']\n'])
+
+    assert ENGINES['numpy'] is select_engine(checker)
+
+
+@pytest.mark.parametrize('dense', [True, False])
+def test_select_engine_never_lines(monkeypatch, dense):
+    monkeypatch.setattr(
+        'flake8_multiline_containers._numpy_installed', lambda: False,
+    )
+    line = "    {'a': [1, 2], 'b': (3, 4)},\n" if dense else 'foo = 1\n'
+    checker = MultilineContainers(lines=[line] * 10)
+
+    assert ENGINES['lines'] is not select_engine(checker)
+
+
+def test_auto_matches_tokens(dummy_file_path):
+    dense = f'{dummy_file_path}/dict/nested_dict.py'
+    sparse = f'{dummy_file_path}/engines.py'
+
+    assert _check_with('tokens', dense) == _check_with('auto', dense)
+    assert _check_with('tokens', sparse) == _check_with('auto', sparse)
+
+
+@pytest.mark.skipif(
+    not ENGINES['tree'].available,
+    reason='AST end positions require Python 3.8',
+)
+def test_select_engine_sparse_file():
+    checker = MultilineContainers(lines=['foo = 1\n'] * 10)
+
+    assert ENGINES['tree'] is select_engine(checker)
+
+
+def test_engine_throughput():
+    engine = ENGINES['lines']
+    lines_checked = engine.lines_checked
+
+    engine.run(MultilineContainers(lines=['foo = {\n', '}\n']))
+
+    assert lines_checked + 2 == engine.lines_checked
+    assert engine.throughput > 0
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Most time the plugin may take to import, in microseconds, not counting the
+# modules it imports. Measured after flake8 itself is imported, as when flake8
+# loads plugins. Release 0.0.11 took about 1400 here, and the plugin has to
+# stay near that: it defines no attrs classes, and everything flake8 doesn't
+# need is in flake8_multiline_containers_standalone.
+IMPORT_BUDGET = 1500
+
+# Modules the plugin may import that flake8 doesn't already. The standalone
+# module isn't one of them, and neither is attrs.
+ALLOWED_IMPORTS = {'array'}
+
+
+def _import_times(pycache_prefix) -> tuple:
+    """Import the plugin after flake8 and report what it cost.
+
+    Returns:
+        The time in microseconds spent in the plugin's own module, and the
+        names of the modules it imported
+
+    """
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    stderr = subprocess.run(
+        [
+            sys.executable,
+            '-X', 'importtime',
+            '-X', f'pycache_prefix={pycache_prefix}',
+            '-c', 'import flake8.checker, flake8.main.cli; '
+                  'import flake8_multiline_containers',
+        ],
+        env=env,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stderr
+
+    imported = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        self_time, _, name = line[len('import time:'):].split('|')
+        if name.strip() == 'flake8_multiline_containers':
+            return int(self_time), imported
+
+        if name.startswith('  '):
+            imported.append(name.strip())
+
+        else:
+            # Imported by flake8, not by the plugin.
+            imported = []
+
+    raise AssertionError(f'Plugin was not imported:\n{stderr}')
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 8),
+    reason='-X pycache_prefix requires Python 3.8',
+)
+def test_import_time_budget(tmp_path):
+    # The first import writes the bytecode cache, so don't count it.
+    _import_times(tmp_path)
+    self_time, imported = min(_import_times(tmp_path) for _ in range(5))
+
+    assert {name.split('.')[0] for name in imported} <= ALLOWED_IMPORTS
+    assert self_time < IMPORT_BUDGET
@@ -0,0 +1,95 @@
+import os
+import tokenize
+
+from flake8_multiline_containers import IncrementalChecker, check_stream
+
+import pytest
+
+
+def _full_check(lines):
+    """Check with tokens, keeping the errors found before any TokenError."""
+    errors = []
+    try:
+        for error in check_stream(lines):
+            errors.append(error)
+    except (SyntaxError, tokenize.TokenError):
+        pass
+
+    return sorted(errors)
+
+
+def _errors(errors):
+    return sorted(e[:3] for e in errors)
+
+
+@pytest.fixture
+def dict_lines(dummy_file_path):
+    path = os.path.join(dummy_file_path, 'dict', 'dict.py')
+    with open(path) as f:
+        return f.readlines()
+
+
+def test_incremental_initial_check(dict_lines):
+    checker = IncrementalChecker(dict_lines)
+
+    assert _full_check(dict_lines) == _errors(checker.errors)
+
+
+@pytest.mark.parametrize('start, stop, new_lines', [
+    # Fix a JS101 error
+    (33, 36, ['foo = {\n', "    'a': 'hello',\n", '}\n']),
+    # Add a JS102 error
+    (5, 9, ['foo = {\n', "    'a': 'hello'}\n"]),
+    # Open a container that is never closed
+    (1, 1, ['foo = [\n']),
+    # Start a string that swallows the rest of the file
+    (0, 0, ['"""\n']),
+    # Delete lines
+    (10, 20, []),
+])
+def test_incremental_update(dict_lines, start, stop, new_lines):
+    checker = IncrementalChecker(dict_lines)
+    errors = checker.update(start, stop, new_lines)
+
+    dict_lines[start:stop] = new_lines
+    assert _full_check(dict_lines) == _errors(errors)
+
+
+def test_incremental_empty(dict_lines):
+    checker = IncrementalChecker([])
+
+    assert [] == checker.errors
+    errors = checker.update(0, 0, dict_lines)
+    assert _full_check(dict_lines) == _errors(errors)
+
+
+def test_incremental_delete_everything(dict_lines):
+    checker = IncrementalChecker(dict_lines)
+    checker.update(0, len(dict_lines), [])
+    errors = checker.update(0, 0, ['foo = {\n', "    'a': 'hello'}\n"])
+
+    assert [(2, 16)] == [e[:2] for e in errors]
+
+
+def test_incremental_update_stops_early(dict_lines):
+    checker = IncrementalChecker(dict_lines * 100)
+    checker.update(33, 36, ['foo = {\n', "    'a': 'hello',\n", '}\n'])
+
+    assert checker.lines_checked < 10
+
+
+def test_incremental_update_inside_blocks():
+    lines = [
+        'def foo():\n',
+        '    if bar:\n',
+        '        x = [1,\n',
+        '             2]\n',
+        '    return {\n',
+        '        1}\n',
+    ]
+    checker = IncrementalChecker(lines)
+    errors = checker.update(3, 4, ['             2,\n', '        ]\n'])
+
+    lines[3:4] = ['             2,\n', '        ]\n']
+    assert _full_check(lines) == _errors(errors)
+    assert [(3, 12), (7, 9)] == [e[:2] for e in errors]
@@ -0,0 +1,59 @@
+import flake8_multiline_containers
+from flake8_multiline_containers import (
+    LINE_CACHE_SIZE,
+    MultilineContainers,
+    set_line_cache_size,
+)
+
+import pytest
+
+
+@pytest.fixture
+def line_cache():
+    set_line_cache_size(8)
+    yield flake8_multiline_containers.line_cache
+    set_line_cache_size(LINE_CACHE_SIZE)
+
+
+def test_line_cache_shared_between_checkers(line_cache):
+    lines = ['foo = {\n', "    'a': 1,\n", '}\n']
+    MultilineContainers(lines=lines).check_lines()
+    MultilineContainers(lines=lines).check_lines()
+
+    info = line_cache.cache_info()
+    assert 3 == info.misses
+    assert 3 == info.hits
+
+
+def test_line_cache_keeps_string_state(line_cache):
+    linter = MultilineContainers(lines=['foo = """\n', '}\n', '"""\n', '}\n'])
+    linter.check_lines()
+
+    # The same line inside and outside a string is cached separately.
+    assert 4 == line_cache.cache_info().misses
+    assert [] == linter.errors
+
+
+def test_set_line_cache_size_disabled():
+    set_line_cache_size(0)
+    MultilineContainers(lines=['}\n', '}\n']).check_lines()
+
+    info = flake8_multiline_containers.line_cache.cache_info()
+    set_line_cache_size(LINE_CACHE_SIZE)
+
+    assert 0 == info.hits
+
+
+def test_lines_without_brackets_or_quotes_skipped(line_cache):
+    linter = MultilineContainers(lines=[
+        'foo = """\n',
+        'no quotes here\n',
+        '"""\n',
+        'bar = 1\n',
+        'baz = {\n',
+        '}\n',
+    ])
+    linter.check_lines()
+
+    assert 4 == line_cache.cache_info().misses
+    assert [] == linter.errors
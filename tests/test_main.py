@@ -0,0 +1,47 @@
+from flake8_multiline_containers_standalone import check_file, main
+
+import pytest
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_main_reports_errors(capsys, dummy_file_path, jobs):
+    code = main([f'{dummy_file_path}/list', '--jobs', jobs])
+
+    out = capsys.readouterr().out.splitlines()
+    assert 1 == code
+    assert 11 == len(out)
+    assert out[0].startswith(f'{dummy_file_path}/list/list.py:19:')
+
+
+def test_main_no_errors(capsys, dummy_file_path):
+    code = main([f'{dummy_file_path}/comments.py'])
+
+    assert 0 == code
+    assert '' == capsys.readouterr().out
+
+
+def test_check_file_syntax_error(tmp_path):
+    path = tmp_path / 'broken.py'
+    path.write_text('foo = {1,\n}\nif\n')
+
+    assert 1 == len(check_file(str(path)))
+
+
+@pytest.mark.parametrize('jobs', ['1', '2'])
+def test_main_unreadable_files(capsys, tmp_path, dummy_file_path, jobs):
+    missing = tmp_path / 'missing.py'
+    bad_cookie = tmp_path / 'bad_cookie.py'
+    bad_cookie.write_text('# -*- coding: uft-8 -*-\nfoo = 1\n')
+
+    code = main([
+        str(missing),
+        str(bad_cookie),
+        f'{dummy_file_path}/list/list.py',
+        '--jobs', jobs,
+    ])
+
+    out = capsys.readouterr().out.splitlines()
+    assert 1 == code
+    assert 8 == len(out)
+    assert out[0].startswith(f'{bad_cookie}:0:1: E902 SyntaxError: ')
+    assert out[1].startswith(f'{missing}:0:1: E902 FileNotFoundError: ')
@@ -0,0 +1,71 @@
+import glob
+import os
+import tokenize
+
+from flake8_multiline_containers import check_mapped, check_tokens
+from flake8_multiline_containers_standalone import check_file
+
+import pytest
+
+DUMMY_FILES = sorted(glob.glob(
+    os.path.join(os.path.dirname(__file__), 'dummy', '*', '*.py'),
+))
+
+
+def _check_with_tokens(path):
+    with tokenize.open(path) as f:
+        lines = f.readlines()
+
+    tokens = tokenize.generate_tokens(iter(lines).__next__)
+    return sorted(check_tokens(tokens, lines))
+
+
+def test_dummy_files_found():
+    assert DUMMY_FILES
+
+
+@pytest.mark.parametrize('path', DUMMY_FILES)
+def test_check_mapped_matches_tokens(path):
+    assert _check_with_tokens(path) == sorted(check_mapped(path))
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-8-sig', 'latin-1'])
+def test_check_mapped_columns_are_characters(tmp_path, encoding):
+    path = tmp_path / 'accents.py'
+    source = (
+        '# -*- coding: latin-1 -*-\n' if encoding == 'latin-1' else ''
+    ) + 'café = ["é", "è",\n    "à"]\n'
+    path.write_text(source, encoding=encoding)
+
+    errors = check_mapped(str(path))
+
+    assert 2 == len(errors)
+    assert _check_with_tokens(str(path)) == sorted(errors)
+
+
+def test_check_mapped_ignores_brackets_in_strings(tmp_path):
+    path = tmp_path / 'strings.py'
+    path.write_text(
+        'a = """\n[\n"""\n'
+        "b = r'\\'(' + 'x'  # {\n"
+        'c = foo(1,\n        2)\n',
+    )
+
+    assert [] == check_mapped(str(path))
+
+
+def test_check_mapped_unclosed(tmp_path):
+    path = tmp_path / 'unclosed.py'
+    path.write_text('foo = {1,\n')
+
+    with pytest.raises(tokenize.TokenError):
+        check_mapped(str(path))
+
+
+def test_check_file_large_file(tmp_path):
+    path = tmp_path / 'large.py'
+    path.write_text('foo = [1,\n]\nbar = (\n    1, 2\n  )\n')
+
+    errors = check_file(str(path), large_file_size=0)
+
+    assert [(1, 6), (5, 2)] == [e[:2] for e in errors]
@@ -0,0 +1,61 @@
+import glob
+import os
+import tokenize
+
+from flake8_multiline_containers import (
+    check_numpy,
+    check_tokens,
+    ENGINES,
+    MultilineContainers,
+)
+
+import pytest
+
+DUMMY_FILES = sorted(glob.glob(
+    os.path.join(os.path.dirname(__file__), 'dummy', '*', '*.py'),
+))
+
+
+def _read(path):
+    with tokenize.open(path) as f:
+        return f.readlines()
+
+
+def test_dummy_files_found():
+    assert DUMMY_FILES
+
+
+@pytest.mark.parametrize('path', DUMMY_FILES)
+def test_check_numpy_matches_tokens(path):
+    pytest.importorskip('numpy')
+    lines = _read(path)
+    tokens = tokenize.generate_tokens(iter(lines).__next__)
+
+    errors = check_numpy(''.join(lines).encode('utf-8'))
+
+    assert sorted(check_tokens(tokens, lines)) == sorted(errors)
+
+
+def test_check_numpy_columns_are_characters():
+    pytest.importorskip('numpy')
+    source = 'café = ["é", "è",\n    "à"]\n'.encode('utf-8')
+
+    assert [(1, 7), (2, 7)] == [e[:2] for e in check_numpy(source)]
+
+
+def test_check_numpy_unclosed():
+    pytest.importorskip('numpy')
+
+    with pytest.raises(tokenize.TokenError):
+        check_numpy(b'foo = "bar\n')
+
+
+def test_numpy_engine_without_numpy(monkeypatch, dummy_file_path):
+    # Importing a module set to None raises ImportError.
+    monkeypatch.setitem(__import__('sys').modules, 'numpy', None)
+    lines = _read(f'{dummy_file_path}/dict/dict.py')
+    checker = MultilineContainers(lines=lines, engine='numpy')
+
+    ENGINES['numpy'].run(checker)
+
+    assert 8 == len(checker.errors)
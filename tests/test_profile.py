@@ -0,0 +1,76 @@
+import subprocess
+import sys
+
+
+def _stderr(*args):
+    return subprocess.run(
+        [sys.executable, '-m', *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    ).stderr
+
+
+def test_profile_flake8_jobs(dummy_file_path):
+    stderr = _stderr(
+        'flake8', '--isolated', '--select=JS', '--jobs=2',
+        '--multiline-containers-profile',
+        '--multiline-containers-engine=lines',
+        dummy_file_path,
+    )
+
+    assert '3 process(es)' in stderr
+    assert '_check_opening' in stderr
+    assert 'strip_line' in stderr
+
+
+def test_profile_dump(dummy_file_path, tmp_path):
+    dump = tmp_path / 'stats.prof'
+    _stderr(
+        'flake8', '--isolated', '--select=JS', '--jobs=1',
+        f'--multiline-containers-profile-dump={dump}',
+        dummy_file_path,
+    )
+
+    assert dump.exists()
+
+
+def test_profile_standalone(dummy_file_path):
+    stderr = _stderr(
+        'flake8_multiline_containers', '--profile', '--jobs=1',
+        dummy_file_path,
+    )
+
+    assert '1 process(es)' in stderr
+    assert 'select_engine' in stderr
+
+
+def test_profile_standalone_large_files(dummy_file_path):
+    stderr = _stderr(
+        'flake8_multiline_containers', '--profile', '--jobs=1',
+        '--large-file-size=0', dummy_file_path,
+    )
+
+    assert 'check_mapped' in stderr
+
+
+def test_profile_slowest_files(dummy_file_path):
+    stderr = _stderr(
+        'flake8', '--isolated', '--select=JS', '--jobs=2',
+        '--multiline-containers-profile-slowest=1',
+        dummy_file_path,
+    )
+
+    header, slowest = stderr.splitlines()[-2:]
+    assert header.endswith('lines/s file')
+    assert slowest.endswith('.py')
+
+
+def test_profile_slow_lines(dummy_file_path):
+    stderr = _stderr(
+        'flake8_multiline_containers', '--jobs=1', '--engine=lines',
+        '--profile-slow-line=0', dummy_file_path,
+    )
+
+    assert 'brackets line' in stderr
+    assert f'{dummy_file_path}/dict/dict.py:2\n' in stderr
@@ -0,0 +1,65 @@
+import os
+import sys
+
+from flake8_multiline_containers import MultilineContainers, ResultCache
+
+import pytest
+
+
+@pytest.fixture
+def result_cache(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    MultilineContainers.result_cache = cache
+    yield cache
+    MultilineContainers.result_cache = None
+
+
+def test_result_cache_round_trip(tmp_path):
+    errors = [(1, 6, 'JS101 Multi-line container', None)]
+    ResultCache(directory=str(tmp_path)).set('abc', errors)
+
+    assert errors == ResultCache(directory=str(tmp_path)).get('abc')
+
+
+def test_result_cache_miss(tmp_path):
+    assert ResultCache(directory=str(tmp_path)).get('abc') is None
+
+
+def test_result_cache_key_depends_on_config():
+    lines = ['foo = {\n', '}\n']
+
+    assert ResultCache.key(lines, 'lines') != ResultCache.key(lines, 'tree')
+
+
+def test_result_cache_prune_oldest(tmp_path):
+    cache = ResultCache(directory=str(tmp_path), max_entries=2)
+    for mtime, key in enumerate(['a', 'b', 'c']):
+        cache.set(key, [])
+        os.utime(tmp_path / f'{key}.json', (mtime, mtime))
+
+    cache.prune()
+
+    assert ['b.json', 'c.json'] == sorted(os.listdir(tmp_path))
+
+
+def test_run_uses_cached_errors(result_cache):
+    lines = ['foo = {\n', '}\n']
+    key = result_cache.key(
+        lines,
+        MultilineContainers.version,
+        MultilineContainers.default_engine,
+        sys.version_info[:2],
+        # Every code, in every kind of container.
+        (None, '{[('),
+    )
+    result_cache.set(key, [(1, 0, 'cached', None)])
+
+    errors = list(MultilineContainers(lines=lines).run())
+
+    assert [(1, 0, 'cached', None)] == errors
+
+
+def test_run_stores_errors(result_cache, tmp_path):
+    list(MultilineContainers(lines=['foo = {1,\n', '}\n']).run())
+
+    assert 1 == len(os.listdir(tmp_path))
@@ -0,0 +1,69 @@
+from flake8_multiline_containers import (
+    Container,
+    ENGINES,
+    MultilineContainers,
+    register_rule,
+    RULES,
+)
+
+import pytest
+
+SOURCE = [
+    'foo = [1,\n',
+    '    2]\n',
+    'bar = call(\n',
+    '    {\n',
+    '        "a": (1,\n',
+    '              2),\n',
+    '    },\n',
+    ')\n',
+]
+
+
+@pytest.fixture
+def containers():
+    """Record every container the engines find, with a rule."""
+    found = []
+
+    @register_rule('record')
+    def record(container):
+        found.append(container)
+        return None
+
+    yield found
+
+    del RULES['record']
+
+
+@pytest.mark.parametrize(
+    'engine',
+    [name for name, e in ENGINES.items() if e.available],
+)
+def test_containers(containers, engine):
+    checker = MultilineContainers(lines=SOURCE, engine=engine)
+    errors = list(checker.run())
+
+    # The tree engine finds them in a different order.
+    assert [
+        Container('[', 1, 6, 0, True, 2, 5),
+        Container('{', 4, 4, 4, False, 7, 4),
+        Container('(', 5, 13, 8, True, 6, 15),
+    ] == sorted(containers, key=lambda c: (c.row, c.column))
+    assert [(1, 6), (2, 5), (5, 13), (6, 15)] == sorted(e[:2] for e in errors)
+
+
+def test_rule_errors():
+    @register_rule('JS199')
+    def no_sets(container):
+        if container.opening == '{' and container.row == 2:
+            return (container.row, container.column, 'JS199 No sets', None)
+
+        return None
+
+    try:
+        lines = ['foo = [\n', '    {\n', '        1,\n', '    },\n', ']\n']
+        errors = list(MultilineContainers(lines=lines, engine='lines').run())
+    finally:
+        del RULES['JS199']
+
+    assert [(2, 4, 'JS199 No sets', None)] == errors
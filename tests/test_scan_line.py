@@ -0,0 +1,34 @@
+from flake8_multiline_containers import EMPTY_SCAN, scan_line
+
+
+def test_scan_line_counts_every_container():
+    scan = scan_line("foo = {'a': [1, 2], 'b': (\n")
+
+    assert (1, 0) == scan.counts['{']
+    assert (1, 1) == scan.counts['[']
+    assert (1, 0) == scan.counts['(']
+
+
+def test_scan_line_ignores_strings_and_comments():
+    scan = scan_line("foo = '{[(' # ({[\n")
+
+    assert (0, 0) == scan.counts['{']
+    assert (0, 0) == scan.counts['[']
+    assert (0, 0) == scan.counts['(']
+
+
+def test_scan_line_function_calls():
+    scan = scan_line("foo = bizbat(bazbin('a',\n")
+
+    assert 2 == scan.function_calls
+    assert not scan.conditional_block
+
+
+def test_scan_line_conditional_block():
+    scan = scan_line("if (a\n")
+
+    assert scan.conditional_block
+
+
+def test_scan_line_without_brackets_is_shared():
+    assert scan_line("foo = 'bar'  # baz\n") is EMPTY_SCAN
@@ -0,0 +1,76 @@
+import os
+
+from flake8.main import cli
+
+from flake8_multiline_containers import (
+    ENGINES,
+    MultilineContainers,
+    set_selection,
+)
+
+import pytest
+
+
+available_engines = [name for name, e in ENGINES.items() if e.available]
+
+LINES = [
+    'foo = {"a": 1,\n',
+    '  }\n',
+    'bar = (1,\n',
+    '  2)\n',
+]
+
+
+def _check(engine):
+    return list(MultilineContainers(lines=LINES, engine=engine).run())
+
+
+def _run_flake8(dummy_file_path, *args):
+    # The options are parsed in this process, and kept for the checks after.
+    path = os.path.abspath(f'{dummy_file_path}/dict/dict.py')
+    try:
+        cli.main([*args, path])
+    except SystemExit:
+        # Older versions of flake8 exit once they're done.
+        pass
+
+
+@pytest.mark.parametrize('engine', available_engines)
+@pytest.mark.parametrize('args, expected', [
+    (['--select', 'JS101'], {'JS101'}),
+    (['--select', 'JS', '--ignore', 'JS101'], {'JS102'}),
+    (['--select', 'E'], set()),
+])
+def test_selected_codes(capsys, dummy_file_path, engine, args, expected):
+    _run_flake8(dummy_file_path, *args)
+
+    assert expected == {e[2][:5] for e in _check(engine)}
+
+
+@pytest.mark.parametrize('engine', available_engines)
+def test_brackets(engine):
+    set_selection(brackets='{}[]')
+
+    assert [1, 2] == sorted(e[0] for e in _check(engine))
+
+
+@pytest.mark.parametrize('engine', available_engines)
+def test_brackets_option(capsys, dummy_file_path, engine):
+    _run_flake8(dummy_file_path, '--multiline-containers-brackets', '()')
+
+    assert [3, 4] == sorted(e[0] for e in _check(engine))
+
+
+@pytest.mark.parametrize('brackets', ['', '<>', '{x'])
+def test_brackets_invalid(brackets):
+    with pytest.raises(ValueError):
+        set_selection(brackets=brackets)
+
+
+def test_brackets_option_invalid(capsys, dummy_file_path):
+    path = os.path.abspath(f'{dummy_file_path}/dict/dict.py')
+    with pytest.raises(SystemExit) as e:
+        cli.main(['--multiline-containers-brackets', 'xyz', path])
+
+    assert 2 == e.value.code
+    assert "Not a set of brackets: 'xyz'" in capsys.readouterr().err
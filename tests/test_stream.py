@@ -0,0 +1,74 @@
+import io
+
+from flake8_multiline_containers import check_stream, MultilineContainers
+from flake8_multiline_containers_standalone import main
+
+import pytest
+
+SOURCE = (
+    'def f():\n'
+    '    return (1,\n'
+    '            2)\n'
+    '\n'
+    'x = foo(a, (1,\n'
+    '    2))\n'
+    'y = [\n'
+    '    1]\n'
+)
+
+
+@pytest.mark.parametrize('path', ['dict/dict.py', 'engines.py'])
+def test_check_stream_matches_tokens_engine(dummy_file_path, path):
+    path = f'{dummy_file_path}/{path}'
+    with open(path) as f:
+        lines = f.readlines()
+
+    with open(path) as f:
+        streamed = list(check_stream(f))
+
+    checker = MultilineContainers(lines=lines, engine='tokens')
+    expected = [e[:3] for e in checker.run()]
+
+    assert expected == streamed
+
+
+def test_check_stream_is_lazy():
+    def lines():
+        yield 'foo = {"a": 1,\n'
+        yield '}\n'
+        pytest.fail('Read past the first error')
+
+    errors = check_stream(lines())
+
+    assert 1 == next(errors)[0]
+
+
+def test_main_reads_stdin(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('foo = [1,\n]\n'))
+
+    code = main(['-'])
+
+    assert 1 == code
+    assert capsys.readouterr().out.startswith('stdin:1:7: JS101 ')
+
+
+@pytest.mark.parametrize('engine', ['auto', 'lines'])
+def test_main_stdin_matches_file(capsys, monkeypatch, tmp_path, engine):
+    path = tmp_path / 'source.py'
+    path.write_text(SOURCE)
+    main([str(path), '--engine', engine])
+    from_file = capsys.readouterr().out.replace(str(path), 'stdin')
+
+    monkeypatch.setattr('sys.stdin', io.StringIO(SOURCE))
+    main(['-', '--engine', engine])
+
+    assert from_file == capsys.readouterr().out
+
+
+def test_main_stdin_not_closed(capsys, monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('foo = [\n    1,\n'))
+
+    code = main(['-'])
+
+    assert 1 == code
+    assert capsys.readouterr().out.startswith('stdin:0:1: E902 TokenError')
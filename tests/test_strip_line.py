@@ -0,0 +1,48 @@
+from flake8_multiline_containers import MultilineContainers, strip_line
+
+
+def test_strip_line_strings_and_comment():
+    code, quote = strip_line("foo = {'a': \"[\"}  # (\n")
+
+    assert 'foo = {: }  ' == code
+    assert quote is None
+
+
+def test_strip_line_escaped_quote():
+    code, _ = strip_line("foo = ['\\'(', b'\\\\']\n")
+
+    assert "foo = [, b]\n" == code
+
+
+def test_strip_line_triple_quote_continues():
+    code, quote = strip_line('sql = f"""SELECT (a,\n')
+
+    assert 'sql = f' == code
+    assert '"""' == quote
+
+
+def test_strip_line_inside_triple_quote():
+    code, quote = strip_line("  b) FROM t\n", "'''")
+
+    assert '' == code
+    assert "'''" == quote
+
+
+def test_strip_line_triple_quote_ends():
+    code, quote = strip_line("  b) FROM t''', (1,\n", "'''")
+
+    assert ', (1,\n' == code
+    assert quote is None
+
+
+def test_triple_quoted_string_not_checked():
+    lines = [
+        'sql = """\n',
+        'SELECT (a,\n',
+        '  b) FROM t WHERE x IN (\n',
+        '"""\n',
+    ]
+    linter = MultilineContainers(lines=lines)
+    linter.check_lines()
+
+    assert [] == linter.errors
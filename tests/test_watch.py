@@ -0,0 +1,167 @@
+import os
+import signal
+import subprocess
+import sys
+
+from flake8_multiline_containers_standalone import (
+    InotifyWatcher,
+    PollingWatcher,
+)
+
+import pytest
+
+BROKEN = 'foo = {"a": 1,\n  }\n'
+
+
+def _polling(paths):
+    return PollingWatcher(paths, interval=0.01)
+
+
+def _inotify(paths):
+    try:
+        return InotifyWatcher(paths)
+    except OSError:
+        pytest.skip('inotify is not available')
+
+
+@pytest.fixture(params=[_polling, _inotify])
+def make_watcher(request):
+    watchers = []
+
+    def make(paths):
+        watcher = request.param(paths)
+        watchers.append(watcher)
+        return watcher
+
+    yield make
+
+    for watcher in watchers:
+        watcher.close()
+
+
+def test_watch_changes(make_watcher, tmp_path):
+    root = str(tmp_path)
+    first = os.path.join(root, 'first.py')
+    second = os.path.join(root, 'second.py')
+    with open(first, 'w') as f:
+        f.write('x = 1\n')
+
+    watcher = make_watcher([root])
+    assert {first} == set(watcher.stats)
+    assert set() == watcher.wait(0.05)
+
+    with open(first, 'a') as f:
+        f.write('y = 2\n')
+
+    assert {first} == watcher.wait(1)
+
+    with open(second, 'w') as f:
+        f.write('z = 3\n')
+
+    with open(os.path.join(root, 'notes.txt'), 'w') as f:
+        f.write('not python\n')
+
+    assert {second} == watcher.wait(1)
+
+    os.remove(first)
+    assert {first} == watcher.wait(1)
+    assert {second} == set(watcher.stats)
+
+
+def test_watch_new_directory(make_watcher, tmp_path):
+    root = str(tmp_path)
+    watcher = make_watcher([root])
+
+    os.mkdir(os.path.join(root, '.hidden'))
+    with open(os.path.join(root, '.hidden', 'ignored.py'), 'w') as f:
+        f.write('x = 1\n')
+
+    os.mkdir(os.path.join(root, 'package'))
+    path = os.path.join(root, 'package', 'module.py')
+    with open(path, 'w') as f:
+        f.write('x = 1\n')
+
+    changed = watcher.wait(1)
+    changed |= watcher.wait(0.05)
+    assert {path} == changed
+
+
+def test_watch_file(make_watcher, tmp_path):
+    root = str(tmp_path)
+    path = os.path.join(root, 'watched.py')
+    with open(path, 'w') as f:
+        f.write('x = 1\n')
+
+    watcher = make_watcher([path])
+    with open(os.path.join(root, 'other.py'), 'w') as f:
+        f.write('x = 1\n')
+
+    assert set() == watcher.wait(0.05)
+
+    with open(path, 'w') as f:
+        f.write('x = 2\n')
+
+    assert {path} == watcher.wait(1)
+
+
+def test_main_watch(tmp_path):
+    path = tmp_path / 'module.py'
+    path.write_text('x = 1\n')
+
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'flake8_multiline_containers',
+            '--watch', str(tmp_path),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    try:
+        assert process.stderr.readline().startswith('0 errors in 0 of 1 ')
+
+        path.write_text(BROKEN)
+        assert process.stdout.readline().startswith(f'{path}:1:')
+        assert process.stdout.readline().startswith(f'{path}:2:')
+        assert process.stderr.readline().startswith(
+            '2 errors in 1 of 1 files, 1 checked in ',
+        )
+
+    finally:
+        process.send_signal(signal.SIGINT)
+        code = process.wait(5)
+
+    assert 1 == code
+
+
+def test_main_watch_unreadable(tmp_path):
+    path = tmp_path / 'module.py'
+    path.write_text('x = 1\n')
+
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'flake8_multiline_containers',
+            '--watch', str(tmp_path),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    try:
+        assert process.stderr.readline().startswith('0 errors in 0 of 1 ')
+
+        path.write_text('# -*- coding: uft-8 -*-\nx = 1\n')
+        assert process.stdout.readline().startswith(
+            f'{path}:0:1: E902 SyntaxError: ',
+        )
+        assert process.stderr.readline().startswith('1 errors in 1 of 1 ')
+
+        # Still watching.
+        path.write_text(BROKEN)
+        assert process.stdout.readline().startswith(f'{path}:1:')
+
+    finally:
+        process.send_signal(signal.SIGINT)
+        code = process.wait(5)
+
+    assert 1 == code